@@ -1,199 +1,315 @@
 import argparse
 import logging
+import os
+import sys
 
 from .settings import Settings
 from .state import State
 from .stats import Details, SortIndex, StatGroup
 from .util.media_type import MediaType
 
+SPECIAL_PARAM_NAMES = frozenset({"auto", "clear_cookies", "help", "log_level", "name_choices", "no_save", "type", "func", "readonly", "func_str", "tmp_dir"})
+
+LOG_LEVEL_CHOICES = ("CRITICAL", "ERROR", "WARNING", "INFO", "DEBUG", "NOTSET")
+MEDIA_TYPE_CHOICES = list(MediaType)
+DETAILS_CHOICES = list(Details)
+SORT_INDEX_CHOICES = list(SortIndex)
+STAT_GROUP_CHOICES = list(StatGroup)
+
+# type= converters bound once instead of re-resolving the descriptor per definition
+media_type_getter = MediaType.__getattr__
+details_getter = Details.__getattr__
+sort_index_getter = SortIndex.__getattr__
+stat_group_getter = StatGroup.__getattr__
+
+
+# Shared single-flag parents so the same option isn't redefined per subparser
+media_type_parent = argparse.ArgumentParser(add_help=False)
+media_type_parent.add_argument("--media-type", choices=MEDIA_TYPE_CHOICES, type=media_type_getter, help="Filter for a specific type")
+
+exact_parent = argparse.ArgumentParser(add_help=False)
+exact_parent.add_argument("--exact", action="store_const", const=True, default=False, help="Only show exact matches")
+
+stream_index_parent = argparse.ArgumentParser(add_help=False)
+stream_index_parent.add_argument("--stream-index", "-q", default=0, type=int)
+
+# Top-level help lines; kept out of the builders so the help/error paths can
+# register subcommands by name without constructing their full parsers
+SUB_COMMAND_HELP = {
+    "download-unread-chapters": "Downloads all chapters that have not been read",
+    "download_specific_chapters": "Used to download specific chapters",
+    "bundle-unread-chapters": "Bundle individual manga pages into a single file",
+    "read_bundle": "Open a saved bundle for reading. If the command exits with status 0, then the container chapters will be marked read",
+    "view": "View pages of chapters",
+    "play": "Either stream anime or directly play downloaded media",
+    "consume": "Either view or play media depending on type",
+    "stream": "Streams anime; this won't download any files; if the media is already downloaded, it will be used directly",
+    "get-stream-url": "Gets the steaming url for the media",
+    "clean": "Removes unused media",
+}
+
 
 def gen_auto_complete(parser):
     """ Support autocomplete via argcomplete if installed"""
-    try:  # pragma: no cover
-        import argcomplete
-        argcomplete.autocomplete(parser)
-    except ImportError:
-        pass
+    # argcomplete only does anything when its shell hook sets _ARGCOMPLETE
+    if "_ARGCOMPLETE" in os.environ:  # pragma: no cover
+        try:
+            import argcomplete
+            argcomplete.autocomplete(parser)
+        except ImportError:
+            pass
 
 
 def add_parser_helper(sub_parser, name, func_str=None, **kwargs):
     parser = sub_parser.add_parser(name, **kwargs)
-    parser.set_defaults(func_str=func_str or name)
+    # Precompute the dispatch attribute name so dispatch does a plain getattr
+    parser.set_defaults(func_str=(func_str or name).replace("-", "_"))
     return parser
 
 
-def parse_args(args=None, media_reader=None, already_upgraded=False):
-    SPECIAL_PARAM_NAMES = {"auto", "clear_cookies", "log_level", "no_save", "type", "func", "readonly", "func_str", "tmp_dir"}
+class LazyChoices:
+    """ Defers computing a choices list until argparse actually validates or formats it"""
 
-    state = State(Settings()) if not media_reader else media_reader.state
+    def __init__(self, func):
+        self.func = func
+
+    def __contains__(self, value):
+        return value in self.func()
+
+    def __iter__(self):
+        return iter(self.func())
 
-    parser = argparse.ArgumentParser()
-    parser.add_argument("--auto", action="store_const", const=True, default=False, help="Automatically select input instead of prompting")
-    parser.add_argument("--clear-cookies", default=False, action="store_const", const=True, help="Clear all cached cookies")
-    parser.add_argument("--log-level", default="INFO", choices=logging._levelToName.values(), help="Controls verbosity of logs")
-    parser.add_argument("--no-save", default=False, action="store_const", const=True, help="Do not save state/cookies")
-    parser.add_argument("--tmp-dir", default=False, action="store_const", const=True, help="Save state to tmp-dir")
 
-    sub_parsers = parser.add_subparsers(dest="type")
+def get_sub_command(args):
+    """ Returns the first positional token of args or None if no subcommand can be determined"""
+    arg_iter = iter(args)
+    for arg in arg_iter:
+        if arg in ("-h", "--help"):
+            return None
+        if arg == "--log-level":
+            next(arg_iter, None)
+        elif not arg.startswith("-"):
+            return arg
+    return None
 
+
+def build_readonly_parent():
     readonly_parsers = argparse.ArgumentParser(add_help=False)
     readonly_parsers.set_defaults(readonly=True)
+    return readonly_parsers
+
 
-    sub_search_parsers = argparse.ArgumentParser(add_help=False)
+def build_search_parent(state):
+    sub_search_parsers = argparse.ArgumentParser(add_help=False, parents=[exact_parent, media_type_parent])
     sub_search_parsers.add_argument("--no-sort-by-preferred-lang", action="store_const", const=None, default=state.settings.get_prefered_lang_key, help="Sort results by preferred Settings:preferred_primary_language", dest="sort_func")
-    sub_search_parsers.add_argument("--exact", action="store_const", const=True, default=False, help="Only show exact matches")
     sub_search_parsers.add_argument("--limit", type=int, default=10, help="How many chapters will be downloaded per series")
-    sub_search_parsers.add_argument("--media-type", choices=list(MediaType), type=MediaType.__getattr__, help="Filter for a specific type")
-    sub_search_parsers.add_argument("--server", choices=state.get_server_ids(), dest="server_id")
+    sub_search_parsers.add_argument("--server", choices=LazyChoices(state.get_server_ids), dest="server_id")
+    return sub_search_parsers
+
+
+def build_consume_parent():
+    sub_consume_parsers = argparse.ArgumentParser(add_help=False, parents=[stream_index_parent])
+    sub_consume_parsers.add_argument("--abs", default=False, action="store_const", const=True, dest="force_abs")
+    sub_consume_parsers.add_argument("--any-unread", "-a", default=False, action="store_const", const=True)
+    sub_consume_parsers.add_argument("--limit", "-l", default=0, type=int)
+    sub_consume_parsers.add_argument("--shuffle", "-s", default=False, action="store_const", const=True)
+    return sub_consume_parsers
 
-    # add remove
-    search_parsers = add_parser_helper(sub_parsers, "search_for_media", aliases=["search"], parents=[sub_search_parsers], description="Search for and add media")
+
+# add remove
+def build_search_parser(sub_parsers, state):
+    search_parsers = add_parser_helper(sub_parsers, "search_for_media", aliases=["search"], parents=[build_search_parent(state)], description="Search for and add media")
     search_parsers.add_argument("name", help="The string to search by")
 
-    migrate_parsers = add_parser_helper(sub_parsers, "migrate", description="Move media to another server")
-    migrate_parsers.add_argument("--exact", action="store_const", const=True, default=False, help="Only show exact matches")
+
+def build_migrate_parser(sub_parsers, state):
+    migrate_parsers = add_parser_helper(sub_parsers, "migrate", parents=[exact_parent], description="Move media to another server")
     migrate_parsers.add_argument("--force-same-id", action="store_const", const=True, default=False, help="Forces the media id to be the same")
     migrate_parsers.add_argument("--self", action="store_const", const=True, default=False, help="Re-adds the media", dest="move_self")
-    migrate_parsers.add_argument("name", choices=state.get_all_names(), help="Global id of media to move")
+    migrate_parsers.add_argument("name", help="Global id of media to move")
+    migrate_parsers.set_defaults(name_choices=state.get_all_names)
 
+
+def build_add_from_url_parser(sub_parsers, state):
     add_parsers = add_parser_helper(sub_parsers, "add-from-url", description="Add media by human viewable location")
     add_parsers.add_argument("url", help="Either the series home page or the page for an arbitrary chapter (depends on server)")
 
+
+def build_remove_parser(sub_parsers, state):
     remove_parsers = add_parser_helper(sub_parsers, "remove", func_str="remove-media", description="Remove media")
-    remove_parsers.add_argument("id", choices=state.get_all_single_names(), help="Global id of media to remove")
+    remove_parsers.add_argument("id", choices=LazyChoices(state.get_all_single_names), help="Global id of media to remove")
 
-    # update and download
-    update_parser = add_parser_helper(sub_parsers, "update", description="Update all media")
-    update_parser.add_argument("--media-type", choices=list(MediaType), type=MediaType.__getattr__, help="Filter for a specific type")
+
+# update and download
+def build_update_parser(sub_parsers, state):
+    update_parser = add_parser_helper(sub_parsers, "update", parents=[media_type_parent], description="Update all media")
     update_parser.add_argument("--no-shuffle", default=False, action="store_const", const=True)
-    update_parser.add_argument("name", choices=state.get_all_names(), default=None, nargs="?", help="Update only specified media")
+    update_parser.add_argument("name", default=None, nargs="?", help="Update only specified media")
+    update_parser.set_defaults(name_choices=state.get_all_names)
+
 
-    download_parser = add_parser_helper(sub_parsers, "download-unread-chapters", aliases=["download-unread"], help="Downloads all chapters that have not been read")
+def build_download_unread_parser(sub_parsers, state):
+    download_parser = add_parser_helper(sub_parsers, "download-unread-chapters", aliases=["download-unread"], parents=[media_type_parent, stream_index_parent], help=SUB_COMMAND_HELP["download-unread-chapters"])
     download_parser.add_argument("--limit", "-l", type=int, default=0, help="How many chapters will be downloaded per series")
-    download_parser.add_argument("--media-type", choices=list(MediaType), type=MediaType.__getattr__, help="Filter for a specific type")
-    download_parser.add_argument("--stream-index", "-q", default=0, type=int)
-    download_parser.add_argument("name", choices=state.get_all_names(), default=None, nargs="?", help="Download only series determined by name")
+    download_parser.add_argument("name", default=None, nargs="?", help="Download only series determined by name")
+    download_parser.set_defaults(name_choices=state.get_all_names)
 
-    download_specific_parser = add_parser_helper(sub_parsers, "download_specific_chapters", aliases=["download"], help="Used to download specific chapters")
-    download_specific_parser.add_argument("--stream-index", "-q", default=0, type=int)
-    download_specific_parser.add_argument("name", choices=state.get_all_single_names())
+
+def build_download_specific_parser(sub_parsers, state):
+    download_specific_parser = add_parser_helper(sub_parsers, "download_specific_chapters", aliases=["download"], parents=[stream_index_parent], help=SUB_COMMAND_HELP["download_specific_chapters"])
+    download_specific_parser.add_argument("name", choices=LazyChoices(state.get_all_single_names))
     download_specific_parser.add_argument("start", type=float, default=0, help="Starting chapter (inclusive)")
     download_specific_parser.add_argument("end", type=float, nargs="?", default=0, help="Ending chapter (inclusive)")
 
-    # media consumption
 
-    bundle_parser = add_parser_helper(sub_parsers, "bundle-unread-chapters", aliases=["bundle"], help="Bundle individual manga pages into a single file")
+# media consumption
+def build_bundle_parser(sub_parsers, state):
+    bundle_parser = add_parser_helper(sub_parsers, "bundle-unread-chapters", aliases=["bundle"], help=SUB_COMMAND_HELP["bundle-unread-chapters"])
     bundle_parser.add_argument("--ignore-errors", "-i", default=False, action="store_const", const=True)
     bundle_parser.add_argument("--limit", "-l", default=0, type=int)
     bundle_parser.add_argument("--shuffle", "-s", default=False, action="store_const", const=True)
-    bundle_parser.add_argument("name", choices=state.get_all_names(MediaType.MANGA), default=None, nargs="?")
+    bundle_parser.add_argument("name", default=None, nargs="?")
+    bundle_parser.set_defaults(name_choices=lambda: state.get_all_names(MediaType.MANGA))
 
-    read_parser = add_parser_helper(sub_parsers, "read_bundle", aliases=["read"], help="Open a saved bundle for reading. If the command exits with status 0, then the container chapters will be marked read")
-    read_parser.add_argument("name", default=None, nargs="?", choices=state.bundles.keys(), help="Name of the bundle")
 
-    sub_consume_parsers = argparse.ArgumentParser(add_help=False)
-    sub_consume_parsers.add_argument("--abs", default=False, action="store_const", const=True, dest="force_abs")
-    sub_consume_parsers.add_argument("--any-unread", "-a", default=False, action="store_const", const=True)
-    sub_consume_parsers.add_argument("--limit", "-l", default=0, type=int)
-    sub_consume_parsers.add_argument("--shuffle", "-s", default=False, action="store_const", const=True)
-    sub_consume_parsers.add_argument("--stream-index", "-q", default=0, type=int)
+def build_read_bundle_parser(sub_parsers, state):
+    read_parser = add_parser_helper(sub_parsers, "read_bundle", aliases=["read"], help=SUB_COMMAND_HELP["read_bundle"])
+    read_parser.add_argument("name", default=None, nargs="?", choices=LazyChoices(lambda: state.bundles.keys()), help="Name of the bundle")
+
 
-    view_parser = add_parser_helper(sub_parsers, "view", func_str="play", parents=[sub_consume_parsers], help="View pages of chapters")
-    view_parser.add_argument("name", choices=state.get_all_names(MediaType.MANGA | MediaType.NOVEL), default=None, nargs="?")
+def build_view_parser(sub_parsers, state):
+    view_parser = add_parser_helper(sub_parsers, "view", func_str="play", parents=[build_consume_parent()], help=SUB_COMMAND_HELP["view"])
+    view_parser.add_argument("name", default=None, nargs="?")
+    view_parser.set_defaults(name_choices=lambda: state.get_all_names(MediaType.MANGA | MediaType.NOVEL))
     view_parser.add_argument("num_list", default=None, nargs="*", type=float)
     view_parser.set_defaults(media_type=MediaType.MANGA | MediaType.NOVEL)
 
-    play_parser = add_parser_helper(sub_parsers, "play", parents=[sub_consume_parsers], help="Either stream anime or directly play downloaded media")
-    play_parser.add_argument("name", choices=state.get_all_names(MediaType.ANIME), default=None, nargs="?")
+
+def build_play_parser(sub_parsers, state):
+    play_parser = add_parser_helper(sub_parsers, "play", parents=[build_consume_parent()], help=SUB_COMMAND_HELP["play"])
+    play_parser.add_argument("name", default=None, nargs="?")
+    play_parser.set_defaults(name_choices=lambda: state.get_all_names(MediaType.ANIME))
     play_parser.add_argument("num_list", default=None, nargs="*", type=float)
     play_parser.set_defaults(media_type=MediaType.ANIME)
 
-    consume_parser = add_parser_helper(sub_parsers, "consume", func_str="play", parents=[sub_consume_parsers], help="Either view or play media depending on type")
-    consume_parser.add_argument("--media-type", choices=list(MediaType), type=MediaType.__getattr__, help="Filter for a specific type")
-    consume_parser.add_argument("name", choices=state.get_all_names(MediaType.ANIME), default=None, nargs="?")
+
+def build_consume_parser(sub_parsers, state):
+    consume_parser = add_parser_helper(sub_parsers, "consume", func_str="play", parents=[build_consume_parent(), media_type_parent], help=SUB_COMMAND_HELP["consume"])
+    consume_parser.add_argument("name", default=None, nargs="?")
+    consume_parser.set_defaults(name_choices=lambda: state.get_all_names(MediaType.ANIME))
     consume_parser.add_argument("num_list", default=None, nargs="*", type=float)
 
-    steam_parser = add_parser_helper(sub_parsers, "stream", help="Streams anime; this won't download any files; if the media is already downloaded, it will be used directly")
+
+def build_stream_parser(sub_parsers, state):
+    steam_parser = add_parser_helper(sub_parsers, "stream", parents=[stream_index_parent], help=SUB_COMMAND_HELP["stream"])
     steam_parser.add_argument("--cont", "-c", default=False, action="store_const", const=True)
     steam_parser.add_argument("--download", "-d", default=False, action="store_const", const=True)
     steam_parser.add_argument("--offset", type=float, default=0, help="Offset the url by N chapters")
-    steam_parser.add_argument("--stream-index", "-q", default=0, type=int)
     steam_parser.add_argument("url")
 
-    stream_url_parser = add_parser_helper(sub_parsers, "get-stream-url", help="Gets the steaming url for the media")
+
+def build_get_stream_url_parser(sub_parsers, state):
+    stream_url_parser = add_parser_helper(sub_parsers, "get-stream-url", help=SUB_COMMAND_HELP["get-stream-url"])
     stream_url_parser.add_argument("--abs", default=False, action="store_const", const=True, dest="force_abs")
     stream_url_parser.add_argument("--limit", "-l", default=0, type=int)
-    stream_url_parser.add_argument("name", choices=state.get_all_names(MediaType.ANIME), default=None, nargs="?")
+    stream_url_parser.add_argument("name", default=None, nargs="?")
+    stream_url_parser.set_defaults(name_choices=lambda: state.get_all_names(MediaType.ANIME))
     stream_url_parser.add_argument("num_list", default=None, nargs="*", type=float)
 
-    # clean
-    clean_parser = add_parser_helper(sub_parsers, "clean", help="Removes unused media")
+
+# clean
+def build_clean_parser(sub_parsers, state):
+    clean_parser = add_parser_helper(sub_parsers, "clean", help=SUB_COMMAND_HELP["clean"])
     clean_parser.add_argument("--bundles", "-b", default=False, action="store_const", const=True, help="Removes bundle info")
     clean_parser.add_argument("--include-local-servers", default=False, action="store_const", const=True, help="Doesn't skip local servers")
     clean_parser.add_argument("--remove-disabled-servers", default=False, action="store_const", const=True, help="Removes all servers not belonging to the active list")
     clean_parser.add_argument("--remove-not-on-disk", default=False, action="store_const", const=True, help="Removes references where the backing directory is emtpy")
     clean_parser.add_argument("--remove-read", default=False, action="store_const", const=True, help="Removes all read chapters")
 
-    # external
 
+# external
+def build_auto_import_parser(sub_parsers, state):
     auto_import_parser = add_parser_helper(sub_parsers, "auto-import", func_str="auto-import-media")
     auto_import_parser.add_argument("--link", action="store_const", const=True, default=False, help="Hard links instead of just moving the file")
 
+
+def build_import_parser(sub_parsers, state):
     import_parser = add_parser_helper(sub_parsers, "import", func_str="import-media")
     import_parser.add_argument("--link", action="store_const", const=True, default=False, help="Hard links instead of just moving the file")
-    import_parser.add_argument("--media-type", default="ANIME", choices=list(MediaType), type=MediaType.__getattr__, help="Filter for a specific type")
+    import_parser.add_argument("--media-type", default="ANIME", choices=MEDIA_TYPE_CHOICES, type=media_type_getter, help="Filter for a specific type")
     import_parser.add_argument("--name", default=None, nargs="?", help="Name Media")
     import_parser.add_argument("--skip-add", action="store_const", const=True, default=False, help="Don't auto add media")
     import_parser.add_argument("files", nargs="+")
 
-    # info
-    list_parser = add_parser_helper(sub_parsers, "list", func_str="list-media", parents=[readonly_parsers])
+
+# info
+def build_list_parser(sub_parsers, state):
+    list_parser = add_parser_helper(sub_parsers, "list", func_str="list-media", parents=[build_readonly_parent(), media_type_parent])
     list_parser.add_argument("--csv", action="store_const", const=True, default=False, help="List in a script friendly format")
-    list_parser.add_argument("--media-type", default=None, choices=list(MediaType), type=MediaType.__getattr__, help="Filter for a specific type")
     list_parser.add_argument("--out-of-date-only", default=False, action="store_const", const=True)
     list_parser.add_argument("--tag", const="", nargs="?")
-    list_parser.add_argument("name", nargs="?", default=None, choices=state.get_server_ids())
+    list_parser.add_argument("name", nargs="?", default=None, choices=LazyChoices(state.get_server_ids))
+
 
-    chapter_parsers = add_parser_helper(sub_parsers, "list-chapters", parents=[readonly_parsers])
+def build_list_chapters_parser(sub_parsers, state):
+    chapter_parsers = add_parser_helper(sub_parsers, "list-chapters", parents=[build_readonly_parent()])
     chapter_parsers.add_argument("--show-ids", action="store_const", const=True, default=False)
-    chapter_parsers.add_argument("name", choices=state.get_all_names())
+    chapter_parsers.add_argument("name")
+    chapter_parsers.set_defaults(name_choices=state.get_all_names)
 
-    add_parser_helper(sub_parsers, "list-servers")
 
+def build_list_servers_parser(sub_parsers, state):
+    add_parser_helper(sub_parsers, "list-servers", parents=[build_readonly_parent()])
+
+
+def build_list_from_servers_parser(sub_parsers, state):
     list_from_servers = add_parser_helper(sub_parsers, "list_some_media_from_server", aliases=["list-from-servers"])
     list_from_servers.add_argument("--limit", "-l", type=int, default=None)
-    list_from_servers.add_argument("server_id", choices=state.get_server_ids())
+    list_from_servers.add_argument("server_id", choices=LazyChoices(state.get_server_ids))
 
+
+def build_tag_parser(sub_parsers, state):
     tag_parser = add_parser_helper(sub_parsers, "tag")
     tag_parser.add_argument("tag_name")
-    tag_parser.add_argument("name", choices=state.get_all_names(), default=None, nargs="?")
+    tag_parser.add_argument("name", default=None, nargs="?")
+    tag_parser.set_defaults(name_choices=state.get_all_names)
+
 
+def build_untag_parser(sub_parsers, state):
     untag_parser = add_parser_helper(sub_parsers, "untag")
     untag_parser.add_argument("tag_name")
-    untag_parser.add_argument("name", choices=state.get_all_names(), default=None, nargs="?")
+    untag_parser.add_argument("name", default=None, nargs="?")
+    untag_parser.set_defaults(name_choices=state.get_all_names)
 
-    # credentials
+
+# credentials
+def build_login_parser(sub_parsers, state):
     login_parser = add_parser_helper(sub_parsers, "test-login", aliases=["login"], description="Relogin to all servers")
     login_parser.add_argument("--force", "-f", action="store_const", const=True, default=False, help="Force re-login")
-    login_parser.add_argument("server_ids", default=None, choices=state.get_server_ids_with_logins(), nargs="?")
+    login_parser.add_argument("server_ids", default=None, choices=LazyChoices(state.get_server_ids_with_logins), nargs="?")
+
 
-    # stats
-    stats_parser = add_parser_helper(sub_parsers, "stats", func_str="list_stats", description="Show tracker stats", parents=[readonly_parsers])
-    stats_parser.add_argument("--details-type", "-d", choices=list(Details), type=Details.__getattr__, default=Details.NO_DETAILS, help="How details are displayed")
+# stats
+def build_stats_parser(sub_parsers, state):
+    stats_parser = add_parser_helper(sub_parsers, "stats", func_str="list_stats", description="Show tracker stats", parents=[build_readonly_parent(), media_type_parent])
+    stats_parser.add_argument("--details-type", "-d", choices=DETAILS_CHOICES, type=details_getter, default=Details.NO_DETAILS, help="How details are displayed")
     stats_parser.add_argument("--details-limit", "-l", type=int, default=None, help="How many details are shown")
-    stats_parser.add_argument("--media-type", choices=list(MediaType), type=MediaType.__getattr__, help="Filter for a specific type")
     stats_parser.add_argument("--min-count", "-m", type=int, default=0, help="Ignore groups with fewer than N elements")
     stats_parser.add_argument("--min-score", type=float, default=1, help="Ignore entries with score less than N")
-    stats_parser.add_argument("--sort-index", "-s", choices=list(SortIndex), type=SortIndex.__getattr__, default=SortIndex.SCORE.name, help="Choose sort index")
-    stats_parser.add_argument("--stat-group", "-g", choices=list(StatGroup), type=StatGroup.__getattr__, default=StatGroup.NAME, help="Choose stat grouping")
+    stats_parser.add_argument("--sort-index", "-s", choices=SORT_INDEX_CHOICES, type=sort_index_getter, default=SortIndex.SCORE.name, help="Choose sort index")
+    stats_parser.add_argument("--stat-group", "-g", choices=STAT_GROUP_CHOICES, type=stat_group_getter, default=StatGroup.NAME, help="Choose stat grouping")
     stats_parser.add_argument("username", default=None, nargs="?", help="Username or id to load info of; defaults to the currently authenticated user")
 
+
+def build_stats_update_parser(sub_parsers, state):
     stats_update_parser = add_parser_helper(sub_parsers, "stats-update", description="Update tracker stats")
     stats_update_parser.add_argument("--user-id", default=None, help="id to load tracking info of")
     stats_update_parser.add_argument("username", default=None, nargs="?", help="Username to load info of; defaults to the currently authenticated user")
 
-    # trackers and progress
-    load_parser = add_parser_helper(sub_parsers, "load_from_tracker", aliases=["load"], parents=[sub_search_parsers], description="Attempts to add all tracked media")
+
+# trackers and progress
+def build_load_parser(sub_parsers, state):
+    load_parser = add_parser_helper(sub_parsers, "load_from_tracker", aliases=["load"], parents=[build_search_parent(state)], description="Attempts to add all tracked media")
     load_parser.add_argument("--force", "-f", action="store_const", const=True, default=False, help="Force set of read chapters to be in sync with progress")
     load_parser.add_argument("--local-only", action="store_const", const=True, default=False, help="Only attempt to find a match among local media")
     load_parser.add_argument("--no-add", action="store_const", const=True, default=False, help="Don't search for and add new media")
@@ -201,61 +317,175 @@ def parse_args(args=None, media_reader=None, already_upgraded=False):
     load_parser.add_argument("--user-id", default=None, nargs="?", help="id to load tracking info of")
     load_parser.add_argument("user_name", default=None, nargs="?", help="Username to load tracking info of; defaults to the currently authenticated user")
 
-    untrack_paraser = add_parser_helper(sub_parsers, "remove_tracker", aliases=["untrack"], description="Removing tracker info")
-    untrack_paraser.add_argument("--media-type", choices=list(MediaType), type=MediaType.__getattr__, help="Filter for a specific type")
-    untrack_paraser.add_argument("name", choices=state.get_all_single_names(), nargs="?", help="Media to untrack")
 
+def build_untrack_parser(sub_parsers, state):
+    untrack_paraser = add_parser_helper(sub_parsers, "remove_tracker", aliases=["untrack"], parents=[media_type_parent], description="Removing tracker info")
+    untrack_paraser.add_argument("name", choices=LazyChoices(state.get_all_single_names), nargs="?", help="Media to untrack")
+
+
+def build_copy_tracker_parser(sub_parsers, state):
     copy_tracker_parser = add_parser_helper(sub_parsers, "copy-tracker", description="Copies tracking info from src to dest")
-    copy_tracker_parser.add_argument("src", choices=state.get_all_single_names(), help="Src media")
-    copy_tracker_parser.add_argument("dst", choices=state.get_all_single_names(), help="Dst media")
+    copy_tracker_parser.add_argument("src", choices=LazyChoices(state.get_all_single_names), help="Src media")
+    copy_tracker_parser.add_argument("dst", choices=LazyChoices(state.get_all_single_names), help="Dst media")
 
-    sync_parser = add_parser_helper(sub_parsers, "sync_progress", aliases=["sync"], description="Attempts to update tracker with current progress")
+
+def build_sync_parser(sub_parsers, state):
+    sync_parser = add_parser_helper(sub_parsers, "sync_progress", aliases=["sync"], parents=[media_type_parent], description="Attempts to update tracker with current progress")
     sync_parser.add_argument("--dry-run", action="store_const", const=True, default=False, help="Don't actually update trackers")
     sync_parser.add_argument("--force", "-f", action="store_const", const=True, default=False, help="Allow progress to decrease")
-    sync_parser.add_argument("--media-type", choices=list(MediaType), type=MediaType.__getattr__, help="Filter for a specific type")
-    sync_parser.add_argument("name", choices=state.get_all_names(), nargs="?", help="Media to sync")
+    sync_parser.add_argument("name", nargs="?", help="Media to sync")
+    sync_parser.set_defaults(name_choices=state.get_all_names)
+
 
-    mark_unread_parsers = add_parser_helper(sub_parsers, "mark-unread", description="Mark all known chapters as unread")
-    mark_unread_parsers.add_argument("--media-type", choices=list(MediaType), type=MediaType.__getattr__, help="Filter for a specific type")
-    mark_unread_parsers.add_argument("name", default=None, choices=state.get_all_names(), nargs="?")
+def build_mark_unread_parser(sub_parsers, state):
+    mark_unread_parsers = add_parser_helper(sub_parsers, "mark-unread", parents=[media_type_parent], description="Mark all known chapters as unread")
+    mark_unread_parsers.add_argument("name", default=None, nargs="?")
+    mark_unread_parsers.set_defaults(name_choices=state.get_all_names)
     mark_unread_parsers.set_defaults(func_str="mark_read", force=True, N=-1, abs=True)
 
-    mark_parsers = add_parser_helper(sub_parsers, "mark-read", description="Mark all known chapters as read")
+
+def build_mark_read_parser(sub_parsers, state):
+    mark_parsers = add_parser_helper(sub_parsers, "mark-read", parents=[media_type_parent], description="Mark all known chapters as read")
     mark_parsers.add_argument("--abs", action="store_const", const=True, default=False, help="Treat N as an abs number")
     mark_parsers.add_argument("--force", "-f", action="store_const", const=True, default=False, help="Allow chapters to be marked as unread")
-    mark_parsers.add_argument("--media-type", choices=list(MediaType), type=MediaType.__getattr__, help="Filter for a specific type")
-    mark_parsers.add_argument("name", default=None, choices=state.get_all_names(), nargs="?")
+    mark_parsers.add_argument("name", default=None, nargs="?")
+    mark_parsers.set_defaults(name_choices=state.get_all_names)
     mark_parsers.add_argument("N", type=int, default=0, nargs="?", help="Consider the last N chapters as not up-to-date")
 
+
+def build_offset_parser(sub_parsers, state):
     offset_parser = add_parser_helper(sub_parsers, "offset")
-    offset_parser.add_argument("name", default=None, choices=state.get_all_names())
+    offset_parser.add_argument("name", default=None)
+    offset_parser.set_defaults(name_choices=state.get_all_names)
     offset_parser.add_argument("offset", type=int, default=None, nargs="?", help="Decrease the chapter number reported by the server by N")
 
-    # upgrade state
+
+# upgrade state
+def build_upgrade_parser(sub_parsers, state):
     add_parser_helper(sub_parsers, "upgrade-state", aliases=["upgrade"], description="Upgrade old state to newer format")
 
-    # store password state
+
+# store password state
+def build_set_password_parser(sub_parsers, state):
     set_password_parser = add_parser_helper(sub_parsers, "set-password", description="Set password")
-    set_password_parser.add_argument("server_id", choices=state.get_server_ids_with_logins())
+    set_password_parser.add_argument("server_id", choices=LazyChoices(state.get_server_ids_with_logins))
     set_password_parser.add_argument("username")
     set_password_parser.set_defaults(func=state.settings.store_credentials)
 
+
+def build_auth_parser(sub_parsers, state):
     auth_parser = add_parser_helper(sub_parsers, "auth")
     auth_parser.add_argument("--just-print", action="store_const", const=True, default=False, help="Just print the auth url")
-    auth_parser.add_argument("tracker_id", choices=state.get_server_ids_with_logins(), nargs="?")
+    auth_parser.add_argument("tracker_id", choices=LazyChoices(state.get_server_ids_with_logins), nargs="?")
+
+
+SUB_PARSER_BUILDERS = {
+    ("search_for_media", "search"): build_search_parser,
+    ("migrate",): build_migrate_parser,
+    ("add-from-url",): build_add_from_url_parser,
+    ("remove",): build_remove_parser,
+    ("update",): build_update_parser,
+    ("download-unread-chapters", "download-unread"): build_download_unread_parser,
+    ("download_specific_chapters", "download"): build_download_specific_parser,
+    ("bundle-unread-chapters", "bundle"): build_bundle_parser,
+    ("read_bundle", "read"): build_read_bundle_parser,
+    ("view",): build_view_parser,
+    ("play",): build_play_parser,
+    ("consume",): build_consume_parser,
+    ("stream",): build_stream_parser,
+    ("get-stream-url",): build_get_stream_url_parser,
+    ("clean",): build_clean_parser,
+    ("auto-import",): build_auto_import_parser,
+    ("import",): build_import_parser,
+    ("list",): build_list_parser,
+    ("list-chapters",): build_list_chapters_parser,
+    ("list-servers",): build_list_servers_parser,
+    ("list_some_media_from_server", "list-from-servers"): build_list_from_servers_parser,
+    ("tag",): build_tag_parser,
+    ("untag",): build_untag_parser,
+    ("test-login", "login"): build_login_parser,
+    ("stats",): build_stats_parser,
+    ("stats-update",): build_stats_update_parser,
+    ("load_from_tracker", "load"): build_load_parser,
+    ("remove_tracker", "untrack"): build_untrack_parser,
+    ("copy-tracker",): build_copy_tracker_parser,
+    ("sync_progress", "sync"): build_sync_parser,
+    ("mark-unread",): build_mark_unread_parser,
+    ("mark-read",): build_mark_read_parser,
+    ("offset",): build_offset_parser,
+    ("upgrade-state", "upgrade"): build_upgrade_parser,
+    ("set-password",): build_set_password_parser,
+    ("auth",): build_auth_parser,
+}
+
+SUB_PARSER_BUILDER_BY_NAME = {name: builder for names, builder in SUB_PARSER_BUILDERS.items() for name in names}
+
+def print_sub_command_summary():
+    """ Compact top-level help printed without constructing an ArgumentParser"""
+    lines = ["usage: amt [-h] [--auto] [--clear-cookies] [--log-level LEVEL] [--no-save] [--tmp-dir] sub_command ..."]
+    lines.extend("  {:32} {}".format(names[0], SUB_COMMAND_HELP.get(names[0], "")).rstrip() for names in SUB_PARSER_BUILDERS)
+    print("\n".join(lines))
+
+
+def parse_args(args=None, media_reader=None, already_upgraded=False):
+    argv = args if args is not None else sys.argv[1:]
+    if argv in (["-h"], ["--help"]):
+        print_sub_command_summary()
+        sys.exit(0)
+
+    state = State(Settings()) if not media_reader else media_reader.state
+
+    # Only build the subparser that will actually be dispatched to; when the
+    # subcommand is ambiguous (help/errors) only stubs are registered
+    sub_command = get_sub_command(argv)
+    builder = SUB_PARSER_BUILDER_BY_NAME.get(sub_command)
+    # Parsers are cached per subcommand on the state itself so repeated
+    # in-process calls (tests, embedding) don't rebuild them; the cached
+    # parsers reference the state, so storing them anywhere longer-lived
+    # would keep the state alive too
+    state_parser_cache = state.__dict__.setdefault("_parser_cache", {})
+    cache_key = sub_command if builder else None
+    if cache_key in state_parser_cache:
+        parser, sub_parsers = state_parser_cache[cache_key]
+    else:
+        # Abbreviated long options would let tokens the subcommand sniffer
+        # treats as values (e.g. "--log DEBUG") slip past it, so disallow them
+        parser = argparse.ArgumentParser(allow_abbrev=False)
+        parser.add_argument("--auto", action="store_const", const=True, default=False, help="Automatically select input instead of prompting")
+        parser.add_argument("--clear-cookies", default=False, action="store_const", const=True, help="Clear all cached cookies")
+        parser.add_argument("--log-level", default="INFO", choices=LOG_LEVEL_CHOICES, help="Controls verbosity of logs")
+        parser.add_argument("--no-save", default=False, action="store_const", const=True, help="Do not save state/cookies")
+        parser.add_argument("--tmp-dir", default=False, action="store_const", const=True, help="Save state to tmp-dir")
+        parser.set_defaults(func=None, dry_run=False, name_choices=None, readonly=False)
+
+        sub_parsers = parser.add_subparsers(dest="type")
+
+        if builder:
+            builder(sub_parsers, state)
+        else:
+            # Help/usage/error output only needs the subcommand names and
+            # summaries, so register stubs instead of every full parser
+            for names in SUB_PARSER_BUILDERS:
+                add_parser_helper(sub_parsers, names[0], aliases=list(names[1:]), help=SUB_COMMAND_HELP.get(names[0]))
+        state_parser_cache[cache_key] = (parser, sub_parsers)
 
     gen_auto_complete(parser)
 
     namespace = parser.parse_args(args)
-    logging.getLogger().setLevel(namespace.log_level)
+    # The largest name lists are validated here instead of via choices= so
+    # argparse never stores or formats them
+    if namespace.name_choices and namespace.name is not None and namespace.name not in namespace.name_choices():
+        parser.error("argument name: invalid choice: {!r}".format(namespace.name))
+    if namespace.log_level != "INFO":
+        # INFO is already set by the entry point's basicConfig
+        logging.getLogger().setLevel(namespace.log_level)
     if namespace.tmp_dir:
         state.settings.set_tmp_dir()
         namespace.no_save = True
 
     action = namespace.type
-    kwargs = {k: v for k, v in vars(namespace).items() if k not in SPECIAL_PARAM_NAMES}
     obj = state
-    if not "readonly" in namespace:
+    if not namespace.readonly:
         # Import only when needed because the act of importing is slow
         from .media_reader_cli import MediaReaderCLI
         media_reader = media_reader if media_reader else MediaReaderCLI(state)
@@ -264,13 +494,19 @@ def parse_args(args=None, media_reader=None, already_upgraded=False):
         if namespace.clear_cookies:
             media_reader.session.cookies.clear()
         obj = media_reader
-        media_reader.auto_select = namespace.auto
+        if namespace.auto:
+            media_reader.auto_select = True
     else:
         namespace.no_save = True
+    should_save = not namespace.no_save and not namespace.dry_run
     try:
         if action:
-            func = namespace.func if "func" in namespace else getattr(obj, (namespace.func_str if "func_str" in namespace else action).replace("-", "_"))
+            # Only the dispatched subparser's own arguments become kwargs
+            sub_parser = sub_parsers.choices[action]
+            arg_names = {arg_action.dest for arg_action in sub_parser._actions} | set(sub_parser._defaults)
+            kwargs = {k: getattr(namespace, k) for k in arg_names if k not in SPECIAL_PARAM_NAMES}
+            func = namespace.func if namespace.func is not None else getattr(obj, namespace.func_str)
             func(**kwargs)
     finally:
-        if not namespace.no_save and ("dry_run" not in namespace or not namespace.dry_run):
+        if should_save:
             state.save()
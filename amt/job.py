@@ -1,7 +1,7 @@
 import logging
 import traceback
 
-from queue import Queue
+from queue import Empty, Queue
 from threading import Thread
 
 
@@ -16,7 +16,7 @@ class ItemWrapper():
 
 
 class Job:
-    def __init__(self, numThreads, iterable=[], func=None, raiseException=False):
+    def __init__(self, numThreads, iterable=[], func=None, raiseException=False, stop_func=None):
         self.numThreads = numThreads
         self.queue = Queue()
         self.exception = None
@@ -24,6 +24,8 @@ class Job:
         self.func = func
         self.enqueue(iterable)
         self.raiseException = raiseException
+        self.stop_func = stop_func
+        self.stopped = False
 
     def enqueue(self, iterable):
         for item in iterable:
@@ -32,14 +34,31 @@ class Job:
     def add(self, item):
         self.queue.put(item)
 
+    def stop(self):
+        """ Stop processing; pending items are dropped so run() can return early"""
+        self.stopped = True
+        while True:
+            try:
+                self.queue.get_nowait()
+                self.queue.task_done()
+            except Empty:
+                break
+
     def worker(self):
-        while not self.queue.empty():
-            item = self.queue.get()
+        while not self.stopped:
+            # Never block on get(); stop() drains the queue concurrently, so a
+            # worker that peeked a non-empty queue could otherwise wait forever
+            try:
+                item = self.queue.get_nowait()
+            except Empty:
+                break
             func = item if not isinstance(item, ItemWrapper) else item.item
             try:
                 if func:
                     ret = func() if not self.func else self.func(func)
                     self.results.append(ret) if not isinstance(ret, list) else self.results.extend(ret)
+                    if self.stop_func and self.stop_func(self.results):
+                        self.stop()
             except Exception as e:
                 if isinstance(e, RetryException) and not isinstance(item, ItemWrapper):
                     if e.retry_count > 0:
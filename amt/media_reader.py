@@ -1,5 +1,4 @@
 import importlib
-import inspect
 import logging
 import os
 import pkgutil
@@ -25,8 +24,8 @@ def import_sub_classes(m, base_class, ):
     for _finder, name, _ispkg in pkgutil.iter_modules(m.__path__, m.__name__ + "."):
         try:
             module = importlib.import_module(name)
-            for _name, obj in dict(inspect.getmembers(module, inspect.isclass)).items():
-                if issubclass(obj, base_class) and obj.id:
+            for obj in vars(module).values():
+                if isinstance(obj, type) and issubclass(obj, base_class) and obj.id:
                     results.add(obj)
         except ImportError:
             logging.debug("Could not import %s", name)
@@ -34,9 +33,29 @@ def import_sub_classes(m, base_class, ):
     return results
 
 
-SERVERS = import_sub_classes(servers, Server)
-TRACKERS = import_sub_classes(trackers, Tracker)
-TORRENT_HELPERS = import_sub_classes(servers, TorrentHelper)
+class LazySubClasses:
+    """ Defers the package walk and module imports until the classes are first needed"""
+
+    def __init__(self, m, base_class):
+        self.m = m
+        self.base_class = base_class
+        self._classes = None
+
+    def load(self):
+        if self._classes is None:
+            self._classes = import_sub_classes(self.m, self.base_class)
+        return self._classes
+
+    def __iter__(self):
+        return iter(self.load())
+
+    def __len__(self):
+        return len(self.load())
+
+
+SERVERS = LazySubClasses(servers, Server)
+TRACKERS = LazySubClasses(trackers, Tracker)
+TORRENT_HELPERS = LazySubClasses(servers, TorrentHelper)
 
 
 class MediaReader:
@@ -50,9 +69,13 @@ class MediaReader:
         self._trackers = {}
         self.tracker = None
 
+        # Size the per-host connection pool for the for_each thread fanout so
+        # parallel requests against one server don't queue on urllib3's default of 10
+        adapter_kwargs = {"pool_maxsize": max(self.settings.threads, 10)}
         if self.settings.max_retries:
-            for prefix in ("http://", "https://"):
-                self.session.mount(prefix, HTTPAdapter(max_retries=Retry(total=self.settings.max_retries, status_forcelist=self.settings.status_to_retry, backoff_factor=self.settings.backoff_factor)))
+            adapter_kwargs["max_retries"] = Retry(total=self.settings.max_retries, status_forcelist=self.settings.status_to_retry, backoff_factor=self.settings.backoff_factor)
+        for prefix in ("http://", "https://"):
+            self.session.mount(prefix, HTTPAdapter(**adapter_kwargs))
 
         for cls_list, instance_map in ((server_list, self._servers), (tracker_list, self._trackers), (torrent_helpers_list, self._torrent_helpers)):
             for cls in cls_list:
@@ -72,13 +95,19 @@ class MediaReader:
         self.state.configure_media(self._servers)
         self.media = self.state.media
         self.bundles = self.state.bundles
+        self._chapter_index = None
+        self._tracked_index = None
+        self._tracked_index_media_count = 0
+        # Servers with neither a stream_url_regex nor their own can_stream_url
+        # can never match a url; skip them up front instead of probing per url
+        self._streamable_servers = [server for server in self.get_servers() if server.stream_url_regex or type(server).can_stream_url is not Server.can_stream_url]
 
     # Helper methods
     def select_media(self, term, results, prompt, no_print=False, auto_select_if_single=False):  # pragma: no cover
         return results[0] if results else None
 
-    def for_each(self, func, media_list, raiseException=False):
-        return Job(self.settings.threads, [lambda x=media_data: func(x) for media_data in media_list], raiseException=raiseException).run()
+    def for_each(self, func, media_list, raiseException=False, stop_func=None):
+        return Job(self.settings.threads, media_list, func=func, raiseException=raiseException, stop_func=stop_func).run()
 
     def get_servers(self):
         return self._servers.values()
@@ -120,8 +149,11 @@ class MediaReader:
 
         logging.debug("Adding %s", global_id)
         self.media[global_id] = media_data
+        self.state.invalidate_name_cache()
+        self._chapter_index = None
+        self._tracked_index = None
         os.makedirs(self.settings.get_media_dir(media_data), exist_ok=True)
-        if no_update is False or no_update is None and not media_data["chapters"]:
+        if no_update is False or no_update is None and not media_data.chapters:
             self.update_media(media_data)
 
     def search_add(self, term, server_id=None, media_type=None, limit=None, exact=False, servers_to_exclude=[], server_list=None, no_add=False, media_id=None, sort_func=None, raiseException=False):
@@ -129,10 +161,15 @@ class MediaReader:
         if server_id:
             results = func(self.get_server(server_id))
         else:
-            results = self.for_each(func, filter(lambda x: x.id not in servers_to_exclude and (media_type is None or media_type & x.media_type), server_list if server_list is not None else self.get_servers()), raiseException=raiseException)
+            # An exact search can stop as soon as some server reports a match
+            # instead of waiting on the stragglers
+            stop_func = (lambda results: any(x["name"] == term for x in results)) if exact and not media_id else None
+            results = self.for_each(func, filter(lambda x: x.id not in servers_to_exclude and (media_type is None or media_type & x.media_type), server_list if server_list is not None else self.get_servers()), raiseException=raiseException, stop_func=stop_func)
         if exact:
-            results = list(filter(lambda x: x["name"] == term, results))
-        results = list(filter(lambda x: not media_id or str(x["id"]) == str(media_id) or x.global_id == media_id, results))
+            results = [x for x in results if x["name"] == term]
+        if media_id:
+            media_id_str = str(media_id)
+            results = [x for x in results if str(x["id"]) == media_id_str or x.global_id == media_id]
         results.sort(key=sort_func if sort_func else self.settings.get_prefered_lang_key)
         if len(results) == 0:
             return None
@@ -174,7 +211,7 @@ class MediaReader:
         return media_data
 
     def add_from_url(self, url):
-        for server in self.get_servers():
+        for server in self._streamable_servers:
             if server.can_stream_url(url):
                 media_data = server.get_media_data_from_url(url)
                 if media_data:
@@ -186,6 +223,9 @@ class MediaReader:
         if id:
             media_data = self.get_single_media(name=id)
         del self.media[media_data.global_id]
+        self.state.invalidate_name_cache()
+        self._chapter_index = None
+        self._tracked_index = None
 
     def auto_import_media(self, files=None, **kwargs):
         for media_type in MediaType:
@@ -218,39 +258,48 @@ class MediaReader:
             if link:
                 os.link(file, dest)
             else:
-                shutil.move(file, dest)
+                try:
+                    # Same-filesystem move is a single rename syscall
+                    os.replace(file, dest)
+                except OSError:
+                    shutil.move(file, dest)
             names.add(media_name)
 
         if not skip_add:
-            for media_name in names:
-                if not any([x["name"] == media_name for x in self.get_media(name=server.id)]):
-                    self.search_add(media_name, server_id=server.id, exact=True)
+            existing_names = {media_data["name"] for media_data in self.get_media(name=server.id)}
+            for media_name in names - existing_names:
+                self.search_add(media_name, server_id=server.id, exact=True)
 
-            for media_data in self.get_media(name=server.id):
-                self.update_media(media_data)
+            self.for_each(self.update_media, self.get_media(name=server.id), raiseException=True)
 
     ############# Upgrade and migration
 
     def migrate(self, name, exact=False, move_self=False, force_same_id=False, raw_id=False):
-        media_list = []
-        last_read_list = []
+        snapshot = list(self.get_media(name=name))
+        media_list = [None] * len(snapshot)
+        last_read_list = [None] * len(snapshot)
+        num_migrated = 0
         failures = 0
-        for media_data in list(self.get_media(name=name)):
+        for media_data in snapshot:
             if move_self:
-                def func(x): return -sum([media_data.get(key, None) == x[key] for key in x])
+                missing = object()
+                def func(x): return -sum(media_data.get(key, missing) == x[key] for key in x)
                 new_media_data = self.search_for_media(media_data["name"], media_type=media_data["media_type"], skip_local_search=True, exact=exact, server_id=media_data["server_id"], media_id=media_data.global_id if raw_id else media_data["id"] if force_same_id else None, sort_func=func, no_add=True)
             else:
                 new_media_data = self.search_for_media(media_data["name"], media_type=media_data["media_type"], skip_local_search=True, exact=exact, servers_to_exclude=[media_data["server_id"]], no_add=True)
             if new_media_data:
                 media_data.copy_fields_to(new_media_data)
-                media_list.append(new_media_data)
-                last_read_list.append(media_data.get_last_read())
+                media_list[num_migrated] = new_media_data
+                last_read_list[num_migrated] = media_data.get_last_read()
+                num_migrated += 1
                 self.remove_media(media_data)
                 self.add_media(new_media_data, no_update=True)
             else:
                 logging.info("Failed to migrate %s", media_data.global_id)
                 failures += 1
 
+        del media_list[num_migrated:]
+        del last_read_list[num_migrated:]
         self.for_each(self.update_media, media_list, raiseException=True)
         for media_data, last_read in zip(media_list, last_read_list):
             self.mark_chapters_until_n_as_read(media_data, last_read)
@@ -279,16 +328,20 @@ class MediaReader:
         Return number of updated chapters
         """
         server = self.get_server(media_data["server_id"])
-        chapter_ids = set(media_data["chapters"].keys())
+        chapter_ids = set(media_data.chapters.keys())
         server.update_media_data(media_data)
+        self._chapter_index = None
 
         if not self.settings.get_keep_unavailable(media_data):
+            chapters = media_data.chapters
             for chapter_id in chapter_ids:
-                if chapter_id in media_data["chapters"] and not media_data["chapters"][chapter_id].check_if_updated_and_clear():
-                    if not server.is_fully_downloaded(media_data, media_data["chapters"][chapter_id]):
-                        del media_data["chapters"][chapter_id]
+                chapter = chapters.get(chapter_id)
+                if chapter is not None and not chapter.check_if_updated_and_clear():
+                    if not server.is_fully_downloaded(media_data, chapter):
+                        del chapters[chapter_id]
 
-        return len(media_data["chapters"].keys() - chapter_ids)
+        media_data.invalidate_sorted_chapters_cache()
+        return len(media_data.chapters.keys() - chapter_ids)
 
     # Downloading
 
@@ -328,7 +381,9 @@ class MediaReader:
         return bundle_name
 
     def read_bundle(self, name=None):
-        bundle_name = name if name else self.state.bundles.get("", max(self.state.bundles.keys()))
+        # The "" entry points at the newest bundle; only scan for the max when
+        # reading state saved before that pointer existed
+        bundle_name = name or self.state.bundles.get("") or max(self.state.bundles.keys())
         if bundle_name in self.bundles and self.settings.open_bundle_viewer(bundle_name, self.state.get_lead_media_data(bundle_name)):
             self.state.mark_bundle_as_read(bundle_name)
             return True
@@ -338,10 +393,13 @@ class MediaReader:
 
     def mark_chapters_until_n_as_read(self, media_data, N, force=False):
         """Marks all chapters whose numerical index <=N as read"""
-        for chapter in media_data["chapters"].values():
+        for chapter in media_data.get_sorted_chapters():
             if chapter["number"] <= N:
                 chapter["read"] = True
-            elif force:
+            elif not force:
+                # Sorted order means no later chapter can match
+                break
+            else:
                 chapter["read"] = False
 
     def mark_read(self, name=None, media_type=None, N=0, force=False, abs=False):
@@ -352,28 +410,26 @@ class MediaReader:
             self.mark_chapters_until_n_as_read(media_data, last_read, force=force)
 
     def get_media_by_chapter_id(self, server_id, chapter_id):
-        for media in self.get_media():
-            if media["server_id"] == server_id:
-                if chapter_id in media["chapters"]:
-                    return media, media["chapters"][chapter_id]
-        return None, None
+        if self._chapter_index is None:
+            self._chapter_index = {(media["server_id"], c_id): (media, chapter) for media in self.get_media() for c_id, chapter in media.chapters.items()}
+        return self._chapter_index.get((server_id, chapter_id), (None, None))
 
     def stream(self, url, cont=False, download=False, stream_index=0, offset=0):
-        for server in self.get_servers():
+        for server in self._streamable_servers:
             if server.can_stream_url(url):
                 chapter_id = server.get_chapter_id_for_url(url)
                 media_data, chapter = self.get_media_by_chapter_id(server.id, chapter_id)
                 if not chapter:
                     media_data = server.get_media_data_from_url(url)
-                    if not media_data["chapters"]:
+                    if not media_data.chapters:
                         server.update_media_data(media_data)
 
-                    chapter = media_data["chapters"][chapter_id]
+                    chapter = media_data.chapters[chapter_id]
                 if download:
                     server.download_chapter(media_data, chapter)
                 else:
-                    min_chapter_num = media_data["chapters"][chapter_id]["number"] + offset
-                    num_list = list(map(lambda x: x["number"], filter(lambda x: x["number"] >= min_chapter_num, media_data["chapters"].values())))
+                    min_chapter_num = media_data.chapters[chapter_id]["number"] + offset
+                    num_list = list(map(lambda x: x["number"], filter(lambda x: x["number"] >= min_chapter_num, media_data.chapters.values())))
                     return self.play(name=media_data, num_list=num_list, limit=None if cont else 1)
                 return 1
         logging.error("Could not find any matching server")
@@ -396,13 +452,15 @@ class MediaReader:
     def play(self, name=None, media_type=None, shuffle=False, limit=None, num_list=None, stream_index=0, any_unread=False, force_abs=False):
         num = 0
         for server, media_data, chapter in (self.get_chapters(media_type, name, num_list, force_abs=force_abs) if num_list else self.get_unreads(name=name, media_type=media_type, limit=limit, shuffle=shuffle, any_unread=any_unread)):
+            fully_downloaded = server.is_fully_downloaded(media_data, chapter)
             if media_data["media_type"] == MediaType.ANIME:
-                if not server.is_fully_downloaded(media_data, chapter):
+                if not fully_downloaded:
                     server.pre_download(media_data, chapter)
             else:
                 server.download_chapter(media_data, chapter)
+                fully_downloaded = True
             success = self.settings.open_viewer(
-                server.get_children(media_data, chapter)if server.is_fully_downloaded(media_data, chapter) else server.get_stream_url(media_data, chapter, stream_index=stream_index),
+                server.get_children(media_data, chapter) if fully_downloaded else server.get_stream_url(media_data, chapter, stream_index=stream_index),
                 media_data=media_data, chapter_data=chapter)
             if success:
                 num += 1
@@ -428,15 +486,15 @@ class MediaReader:
         self.tracker = self._trackers[tracker_id] if not isinstance(tracker_id, Tracker) else tracker_id
 
     def get_tracked_media(self, tracker_id, tracking_id):
-        media_data_list = []
-        for media_data in self.get_media():
-            tacker_info = self.get_tracker_info(media_data, tracker_id)
-            if tacker_info and tacker_info[0] == tracking_id:
-                media_data_list.append(media_data)
-        return media_data_list
-
-    def has_tracker_info(self, media_data, tracker_id=None):
-        return self.get_tracker_info(media_data, tracker_id=tracker_id) is not None
+        # The count check catches direct mutation of the media dict; tracker
+        # changes invalidate explicitly
+        if self._tracked_index is None or self._tracked_index_media_count != len(self.media):
+            self._tracked_index = {}
+            self._tracked_index_media_count = len(self.media)
+            for media_data in self.get_media():
+                for t_id, tracker_info in media_data["trackers"].items():
+                    self._tracked_index.setdefault((t_id, tracker_info[0]), []).append(media_data)
+        return self._tracked_index.get((tracker_id, tracking_id), [])
 
     def get_tracker_info(self, media_data, tracker_id=None):
         if not tracker_id:
@@ -445,18 +503,21 @@ class MediaReader:
 
     def track(self, media_data, tracker_id, tracking_id, tracker_title=None):
         media_data["trackers"][tracker_id] = (tracking_id, tracker_title)
+        self._tracked_index = None
 
     def remove_tracker(self, name, media_type=None, tracker_id=None):
         if not tracker_id:
             tracker_id = self.get_tracker().id
         for media_data in self.get_media(name=name, media_type=media_type):
             del media_data["trackers"][tracker_id]
+        self._tracked_index = None
 
     def copy_tracker(self, src, dst):
         src_media_data = self.get_single_media(name=src)
         dst_media_data = self.get_single_media(name=dst)
-        if self.has_tracker_info(src_media_data):
-            tracking_id, tracker_title = self.get_tracker_info(src_media_data)
+        tracker_info = self.get_tracker_info(src_media_data)
+        if tracker_info:
+            tracking_id, tracker_title = tracker_info
             self.track(dst_media_data, self.get_tracker().id, tracking_id, tracker_title)
 
     def sync_progress(self, name=None, media_type=None, force=False, dry_run=False):
@@ -523,9 +584,11 @@ class MediaReader:
         for media_data in self.get_media(name=name):
             local_offset = offset if offset is not None else media_data.get_first_chapter_number_greater_than_zero() - 1
             diff_offset = local_offset - media_data.get("offset", 0)
-            for chapter in media_data["chapters"].values():
-                chapter["number"] -= diff_offset
-            media_data["offset"] = local_offset
+            if diff_offset:
+                for chapter in media_data.chapters.values():
+                    chapter["number"] -= diff_offset
+                media_data["offset"] = local_offset
+                media_data.invalidate_sorted_chapters_cache()
 
     def tag(self, name, tag_name):
         for media_data in self.get_media(name=name):
@@ -547,32 +610,34 @@ class MediaReader:
             self.bundles.clear()
             shutil.rmtree(self.settings.bundle_dir)
             os.mkdir(self.settings.bundle_dir)
-        for server_dir in os.listdir(self.settings.media_dir):
-            server = self.get_server(server_dir)
-            server_path = os.path.join(self.settings.media_dir, server_dir)
+        # Collect everything to delete first so the rmtrees can run in parallel
+        removal_paths = []
+        for server_entry in list(os.scandir(self.settings.media_dir)):
+            server = self.get_server(server_entry.name)
+            server_path = server_entry.path
             if server:
                 if include_local_servers or not server.is_local_server():
-                    for media_dir in os.listdir(server_path):
-                        media_path = os.path.join(server_path, media_dir)
+                    for media_entry in list(os.scandir(server_path)):
+                        media_path = media_entry.path
                         if media_path not in media_dirs:
                             logging.info("Removing %s because it has been removed", media_path)
-                            shutil.rmtree(media_path)
+                            removal_paths.append(media_path)
                             continue
                         media_data = media_dirs[media_path]
+                        chapter_dirs = {self.settings.get_chapter_dir(media_data, chapter_data, skip_create=True): chapter_data for chapter_data in media_data.get_sorted_chapters()}
                         if remove_read:
-                            for chapter_data in media_data.get_sorted_chapters():
-                                chapter_path = self.settings.get_chapter_dir(media_data, chapter_data, skip_create=True)
-                                if chapter_data["read"] and os.path.exists(chapter_path):
+                            existing_chapter_dir_names = {entry.name for entry in os.scandir(media_path)}
+                            for chapter_path, chapter_data in chapter_dirs.items():
+                                if chapter_data["read"] and os.path.basename(chapter_path) in existing_chapter_dir_names:
                                     logging.info("Removing %s because it has been read", chapter_path)
-                                    shutil.rmtree(chapter_path)
-
-                        chapter_dirs = {self.settings.get_chapter_dir(media_data, chapter_data, skip_create=True): chapter_data for chapter_data in media_data.get_sorted_chapters()}
-                        for chapter_dir in os.listdir(media_path):
-                            chapter_path = os.path.join(media_path, chapter_dir)
-                            if chapter_path not in chapter_dirs and os.path.isdir(chapter_path):
-                                logging.info("Removing %s because chapter info has been removed", chapter_path)
-                                shutil.rmtree(chapter_path)
+                                    removal_paths.append(chapter_path)
+                        for chapter_entry in list(os.scandir(media_path)):
+                            if chapter_entry.path not in chapter_dirs and chapter_entry.is_dir():
+                                logging.info("Removing %s because chapter info has been removed", chapter_entry.path)
+                                removal_paths.append(chapter_entry.path)
 
             elif remove_disabled_servers:
                 logging.info("Removing %s because it is not enabled", server_path)
-                shutil.rmtree(server_path)
+                removal_paths.append(server_path)
+        if removal_paths:
+            self.for_each(shutil.rmtree, removal_paths, raiseException=True)
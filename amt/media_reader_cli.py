@@ -8,8 +8,9 @@ class MediaReaderCLI(MediaReader):
     auto_select = False
 
     def print_results(self, results):
-        for i, media_data in enumerate(results):
-            print("{:4}| {}\t{} {} ({})".format(i, media_data.global_id, media_data["name"], media_data.get("label", media_data["season_title"]), MediaType(media_data["media_type"]).name))
+        lines = ["{:4}| {}\t{} {} ({})".format(i, media_data.global_id, media_data["name"], media_data.get("label", media_data["season_title"]), MediaType(media_data["media_type"]).name) for i, media_data in enumerate(results)]
+        if lines:
+            print("\n".join(lines))
 
     def select_media(self, term, results, prompt, no_print=False, auto_select_if_single=False):
         index = 0
@@ -28,10 +29,6 @@ class MediaReaderCLI(MediaReader):
     def list_some_media_from_server(self, server_id, limit=None):
         self.print_results(self.get_server(server_id).get_media_list(limit=limit)[:limit])
 
-    def list_servers(self):
-        for id in sorted(self.state.get_server_ids()):
-            print(id)
-
     def test_login(self, server_ids=None, force=False):
         failures = False
         for server in self.get_servers():
@@ -102,16 +102,21 @@ class RequestServer:
 
 
 class MediaServer(RequestServer):
+    named_dub_regex = re.compile(r"\((\w*) Dub\)")
+    dub_regex = re.compile(r"\(Dub\)")
+    dir_name_formatter_regex = re.compile(r"[\W]")
+    leading_number_regex = re.compile(r"\d+")
+
     def create_media_data(self, id, name, season_id=None, season_title="", dir_name=None, offset=0, alt_id=None, progress_volumes=None, lang="", **kwargs):
         if lang is None:
-            match = re.search(r"\((\w*) Dub\)", name) or re.search(r"\((\w*) Dub\)", season_title)
+            match = self.named_dub_regex.search(name) or self.named_dub_regex.search(season_title)
             if match:
                 lang = match.group(1) if match else ""
             else:
-                match = re.search(r"\(Dub\)", name) or re.search(r"\(Dub\)", season_title)
+                match = self.dub_regex.search(name) or self.dub_regex.search(season_title)
                 lang = "dub" if match else ""
 
-        return MediaData(dict(server_id=self.id, id=id, dir_name=dir_name if dir_name else re.sub(r"[\W]", "", name.replace(" ", "_")), name=name, media_type=self.media_type.value, media_type_name=self.media_type.name, progress=0, season_id=season_id, season_title=season_title, offset=offset, alt_id=alt_id, trackers={}, progress_volumes=progress_volumes if progress_volumes is not None else self.progress_volumes, tags=[], lang=lang, **kwargs))
+        return MediaData(dict(server_id=self.id, id=id, dir_name=dir_name if dir_name else self.dir_name_formatter_regex.sub("", name.replace(" ", "_")), name=name, media_type=self.media_type.value, media_type_name=self.media_type.name, progress=0, season_id=season_id, season_title=season_title, offset=offset, alt_id=alt_id, trackers={}, progress_volumes=progress_volumes if progress_volumes is not None else self.progress_volumes, tags=[], lang=lang, **kwargs))
 
     def update_chapter_data(self, media_data, id, title, number, premium=False, alt_id=None, special=False, date=None, subtitles=None, inaccessible=False, **kwargs):
         if number is None or number == "" or isinstance(number, str) and number.isalpha():
@@ -123,18 +128,18 @@ class MediaServer(RequestServer):
                 number = float(number.replace("-", "."))
             except ValueError:
                 special = True
-                number = float(re.search("\d+", number).group(0))
+                number = float(self.leading_number_regex.search(number).group(0))
         if media_data["offset"]:
             number = round(number - media_data["offset"], 4)
         if number % 1 == 0:
             number = int(number)
 
         new_values = dict(id=id, title=title, number=number, premium=premium, alt_id=alt_id, special=special, date=date, subtitles=subtitles, inaccessible=inaccessible, **kwargs)
-        if id in media_data["chapters"]:
-            media_data["chapters"][id].update(new_values)
+        if id in media_data.chapters:
+            media_data.chapters[id].update(new_values)
         else:
-            media_data["chapters"][id] = ChapterData(new_values)
-            media_data["chapters"][id]["read"] = False
+            media_data.chapters[id] = ChapterData(new_values)
+            media_data.chapters[id]["read"] = False
         return True
 
     def create_page_data(self, url, id=None, encryption_key=None, ext=None):
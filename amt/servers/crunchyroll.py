@@ -1,6 +1,9 @@
 import logging
 import re
 
+from functools import cache
+from itertools import islice
+
 from ..job import Job
 from ..server import Server
 from ..util.media_type import MediaType
@@ -16,14 +19,21 @@ class GenericCrunchyrollServer(Server):
 
     _access_token = "WveH9VkPLrXvuNm"
     _access_type = "com.crunchyroll.crunchyroid"
+    # Avoids a cookie-jar scan per api url built; cleared when force is set
+    _cached_session_id = None
 
     def get_session_id(self, force=False):
+        if not force and self._cached_session_id:
+            return self._cached_session_id
         session_id = self.session_get_cookie("session_id", domain=self.base_url)
         if not force and session_id:
+            self._cached_session_id = session_id
             return session_id
         with self._lock:
-            if session_id != self.session_get_cookie("session_id", domain=self.base_url):
-                return self.session_get_cookie("session_id", domain=self.base_url)
+            current_session_id = self.session_get_cookie("session_id", domain=self.base_url)
+            if session_id != current_session_id:
+                self._cached_session_id = current_session_id
+                return current_session_id
             data = self.session_post(
                 self.start_session_url,
                 data={
@@ -34,6 +44,7 @@ class GenericCrunchyrollServer(Server):
             ).json()["data"]
 
             assert self.session_get_cookie("session_id", domain=self.base_url) == data["session_id"]
+            self._cached_session_id = data["session_id"]
             return data["session_id"]
 
     def session_get_json(self, url):
@@ -153,6 +164,14 @@ SERIES_DATA = {
     542: "Four Knights of the Apocalypse",
 }
 
+SEARCH_NORMALIZATION_REGEX = re.compile(r"[^\w\d]")
+
+
+@cache
+def get_normalized_series_data():
+    """ Titles normalized once on first search so queries are plain substring tests"""
+    return tuple((SEARCH_NORMALIZATION_REGEX.sub("", name.lower()), id, name) for id, name in SERIES_DATA.items())
+
 
 class Crunchyroll(GenericCrunchyrollServer):
     id = "crunchyroll"
@@ -169,7 +188,7 @@ class Crunchyroll(GenericCrunchyrollServer):
     possible_page_url_keys = ["encrypted_mobile_image_url", "encrypted_composed_image_url"]
     page_url_key = possible_page_url_keys[0]
 
-    stream_url_regex = re.compile(r"crunchyroll.com/manga/([\w-]*)/read/(\d*\.?\d*)")
+    stream_url_regex = re.compile(r"crunchyroll\.com/manga/([\w-]+)/read/(\d+\.?\d*)")
 
     def get_media_data_from_url(self, url):
         name_slug = self.stream_url_regex.search(url).group(1)
@@ -179,25 +198,32 @@ class Crunchyroll(GenericCrunchyrollServer):
         number = self.stream_url_regex.search(url).group(2)
         media_data = self.get_media_data_from_url(url)
         self.update_media_data(media_data)
-        for chapter_data in media_data["chapters"].values():
+        for chapter_data in media_data.chapters.values():
             if chapter_data["number"] == float(number):
                 return chapter_data["id"]
 
+    # Don't know why 66 is special
+    decode_image_table = bytes(b ^ 66 for b in range(256))
+
     @staticmethod
     def decode_image(buffer):
-        # Don't know why 66 is special
-        return bytes(b ^ 66 for b in buffer)
+        return buffer.translate(Crunchyroll.decode_image_table)
 
     def get_media_list(self, limit=None):
         return [self.create_media_data(id=id, name=name, locale="enUS") for id, name in SERIES_DATA.items()][:limit]
 
     def search(self, term, limit=None):
-        regex = re.compile(r"[^\w\d]")
-        term = regex.sub("", term.lower())
-        return list(filter(lambda x: term in regex.sub("", x["name"].lower()), self.get_media_list()))[:limit]
+        term = SEARCH_NORMALIZATION_REGEX.sub("", term.lower())
+        matches = (self.create_media_data(id=id, name=name, locale="enUS") for normalized_name, id, name in get_normalized_series_data() if term in normalized_name)
+        return list(islice(matches, limit))
+
+    @cache
+    def _get_chapters_json(self, media_id):
+        # Resolving several chapter urls for one series shouldn't refetch the list
+        return self.session_get_json(self.api_chapters_url.format(media_id))
 
     def update_media_data(self, media_data: dict):
-        json_data = self.session_get_json(self.api_chapters_url.format(media_data["id"]))
+        json_data = self._get_chapters_json(media_data["id"])
 
         # resp_data = json_data["series"]
         chapters = json_data["chapters"]
@@ -213,17 +239,17 @@ class Crunchyroll(GenericCrunchyrollServer):
 
     def get_media_chapter_data(self, media_data, chapter_data, stream_index=0):
         data = self.session_get_json(self.api_chapter_url.format(self.get_session_id(), chapter_data["id"], Crunchyroll._api_auth_token))
-        raw_pages = data["pages"]
+        raw_pages = [page for page in data["pages"] if page["locale"]]
         raw_pages.sort(key=lambda x: int(x["number"]))
-        pages = [self.create_page_data(url=page["locale"][media_data["locale"]][self.page_url_key], ext="jpg") for page in raw_pages if page["locale"]]
-
-        return pages
+        locale = media_data["locale"]
+        return [self.create_page_data(url=page["locale"][locale][self.page_url_key], ext="jpg") for page in raw_pages]
 
     def save_chapter_page(self, page_data, path):
-        r = self.session_get(page_data["url"])
-        buffer = self.decode_image(r.content)
+        r = self.session_get(page_data["url"], stream=True)
         with open(path, "wb") as fp:
-            fp.write(buffer)
+            # The cipher is byte-wise so each chunk can be decoded independently
+            for chunk in r.iter_content(chunk_size=2**16):
+                fp.write(self.decode_image(chunk))
 
 
 class CrunchyrollAnime(GenericCrunchyrollServer):
@@ -238,7 +264,7 @@ class CrunchyrollAnime(GenericCrunchyrollServer):
     series_url = api_base_url + "/list_collections.0.json?media_type=anime&session_id={}&series_id={}"
     media_type = MediaType.ANIME
 
-    stream_url_regex = re.compile(r"crunchyroll.com/([^/]*)/.*-(\d+)$")
+    stream_url_regex = re.compile(r"crunchyroll\.com/([^/]+)/.*-(\d+)$")
 
     def _create_media_data(self, series_id, item_alt_id, season_id=None, limit=None):
         season_data = self.session_get_json(self.series_url.format(self.get_session_id(), series_id))["data"]
@@ -25,10 +25,16 @@ class GenericFunimation(Server):
 
     media_type = MediaType.ANIME
 
+    csrf_regex = re.compile(r'name="{}"[^>]*value="([^"]+)"'.format(CSRF_NAME))
+
     def _get_csrf(self):
+        # Django also exposes the token as a cookie; only fetch and scan the
+        # login page when it isn't set
+        token = self.session.cookies.get("csrftoken", domain=self.domain)
+        if token:
+            return token
         r = self.session_get(self.login_url)
-        soup = self.soupify(BeautifulSoup, r)
-        return soup.find("input", {"name": self.CSRF_NAME})["value"]
+        return self.csrf_regex.search(r.text).group(1)
 
     def needs_authentication(self):
         return not self.session.cookies.get("src_user_id", domain=self.domain)
@@ -85,7 +91,7 @@ class Funimation(GenericFunimation):
     search_url = "https://api-funimation.dadcdigital.com/xml/longlist/content/page/?id=search&q={}"
     list_url = "https://api-funimation.dadcdigital.com/xml/longlist/content/page/?id=shows&limit={}"
     new_api_episdoe_url = "https://title-api.prd.funimationsvc.com/v1/shows/{}/episodes/{}/?region=US&deviceType=web&locale=en"
-    stream_url_regex = re.compile("funimation.com/v/([^/]*)/([^/]*)")
+    stream_url_regex = re.compile(r"funimation\.com/v/([^/]+)/([^/]+)")
 
     def _get_media_list(self, url, limit=None):
         r = self.session_get(url)
@@ -94,11 +100,10 @@ class Funimation(GenericFunimation):
         job = Job(self.settings.threads, raiseException=True)
         for item in soup.findAll("item")[:limit]:
             id = item.find("id").text
-            job.add(lambda id=id: (self.session_get(self.episode_url.format(id)), id))
-
-        for r, id in job.run():
             title = item.find("title").text
-            data = r.json()
+            job.add(lambda id=id, title=title: (id, title, self.session_get(self.episode_url.format(id)).json()))
+
+        for id, title, data in job.run():
             season_data = {(item["item"]["seasonId"], item["item"]["seasonTitle"], audio) for item in data["items"] for audio in item["audio"]}
             experiences = {item["item"]["seasonId"]: item["mostRecentSvod"]["experience"] for item in data["items"]}
 
@@ -109,7 +109,7 @@ class GenericJNovelClubParts(GenericJNovelClub):
     def update_media_data(self, media_data: dict):
         r = self.session_get(self.chapters_url.format(media_data["id"]))
 
-        for chapter_data in media_data["chapters"].values():
+        for chapter_data in media_data.chapters.values():
             chapter_path = self.settings.get_chapter_dir(media_data, chapter_data, skip_create=True)
             if os.path.exists(chapter_path) and (time.time() - os.path.getmtime(chapter_path)) > self.time_to_live_sec:
                 shutil.rmtree(chapter_path)
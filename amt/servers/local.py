@@ -26,24 +26,29 @@ class LocalServer(Server):
     def get_import_media_dest(self, media_name, file_name):
         media_data = self._create_media_data(media_name)
         self.update_chapter_data(media_data, id=file_name, title=file_name, number=name_parser.get_number_from_file_name(file_name, media_name=media_name))
-        chapter_data = media_data["chapters"][file_name]
+        chapter_data = media_data.chapters[file_name]
         return os.path.join(self.settings.get_chapter_dir(media_data, chapter_data), file_name)
 
     def get_media_list(self, limit=None):
-        return [self._create_media_data(file_name) for file_name in os.listdir(self.settings.get_server_dir(self.id))][:limit] if os.path.exists(self.settings.get_server_dir(self.id)) else []
+        try:
+            with os.scandir(self.settings.get_server_dir(self.id)) as entries:
+                return [self._create_media_data(entry.name) for entry in list(entries)[:limit]]
+        except FileNotFoundError:
+            return []
 
     def update_media_data(self, media_data):
         media_dir = self.settings.get_media_dir(media_data)
-        for file_name in os.listdir(media_dir):
-            chapter_path = os.path.join(media_dir, file_name)
-            if os.path.isdir(chapter_path):
-                pages = os.listdir(chapter_path)
-                if pages:
-                    title = pages[0]
-                    number = float(file_name)
-                    if number % 1 == 0:
-                        number = int(number)
-                    self.update_chapter_data(media_data, id=number, title=title, number=number)
+        with os.scandir(media_dir) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    # Only the first page is needed for the title
+                    with os.scandir(entry.path) as pages:
+                        first_page = next(pages, None)
+                    if first_page is not None:
+                        number = float(entry.name)
+                        if number % 1 == 0:
+                            number = int(number)
+                        self.update_chapter_data(media_data, id=number, title=first_page.name, number=number)
 
     def is_fully_downloaded(self, media_data, chapter_data):
         return os.path.exists(self.settings.get_chapter_dir(media_data, chapter_data, skip_create=True))
@@ -31,7 +31,7 @@ class Mangasee(Server):
         chapter_num = float(self.stream_url_regex.search(url).group(2))
         media_data = self.get_media_data_from_url(url)
         self.update_media_data(media_data)
-        for chapter_data in media_data["chapters"].values():
+        for chapter_data in media_data.chapters.values():
             if chapter_data["number"] == chapter_num:
                 return chapter_data["id"]
 
@@ -1,3 +1,5 @@
+import re
+
 from bs4 import BeautifulSoup
 
 from ..server import TorrentHelper
@@ -9,6 +11,9 @@ class Nyaa(TorrentHelper):
     search_url = base_url + "?s=downloads&o=desc&f=0&c={}&q={}"
     torrent_url = base_url + "/download/{}.torrent"
 
+    # Matches the view link but not its "#comments" sibling
+    view_link_regex = re.compile(r"^/view/\d+$")
+
     def get_media_list(self, limit=10):
         return self.search("", limit=limit)
 
@@ -17,8 +22,9 @@ class Nyaa(TorrentHelper):
         soup = self.soupify(BeautifulSoup, r)
         table = soup.find("table", {"class": "torrent-list"})
         results = []
-        for row, link in ((row, link) for row in table.findAll("tr") for link in row.findAll("a")):
-            if link["href"].startswith("/view/") and not link["href"].endswith("#comments"):
+        for row in table.findAll("tr"):
+            link = row.find("a", href=self.view_link_regex)
+            if link:
                 slug = link["href"].split("/")[-1]
                 title = link["title"]
                 label = " ".join(filter(lambda x: x, map(lambda x: x.getText().strip(), row.findAll("td", {"class": "text-center"}))))
@@ -17,10 +17,12 @@ class GenericVizManga(Server):
     login_url = base_url + "/account/try_login"
     api_chapter_data_url = base_url + "/manga/get_manga_url?device_id=3&manga_id={}&page={}"
     wsj_subscriber_regex = re.compile(r"var is_wsj_subscriber = (\w*);")
+    auth_token_regex = re.compile(r"AUTH_TOKEN\s*=\s*\"(.+?)\"")
+    exif_key_regex = re.compile(b".+?([a-f0-9]{2}(?::[a-f0-9]{2})+)")
 
     def get_token(self):
         auth_token = self.session_get(self.refresh_login_url)
-        token = re.search(r"AUTH_TOKEN\s*=\s*\"(.+?)\"", auth_token.text)
+        token = self.auth_token_regex.search(auth_token.text)
         return token.group(1)
 
     def needs_authentication(self):
@@ -71,8 +73,7 @@ class GenericVizManga(Server):
             key = [int(i, 16) for i in exif[_key].split(":")]
             width, height = exif[256], exif[257]
         else:
-            exif_regex = re.compile(b'.+?([a-f0-9]{2}(?::[a-f0-9]{2})+)')
-            exif_ = exif_regex.search(orig.info.get('exif'))
+            exif_ = self.exif_key_regex.search(orig.info.get('exif'))
             assert exif_ is not None
             key = [int(i, 16) for i in exif_.group(1).decode().split(':')]
             width, height = exif[256], exif[257]
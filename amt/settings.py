@@ -1,4 +1,5 @@
 import getpass
+import importlib.util
 import logging
 import os
 import re
@@ -29,7 +30,7 @@ class Settings:
     password_override_prefix = "PASSWORD_OVERRIDE_"
 
     # HTTP related; Generally used as args to requests
-    bs4_parser = "html.parser"
+    bs4_parser = "lxml" if importlib.util.find_spec("lxml") else "html.parser"  # lxml's C parser is much faster when installed
     max_retries = 3
     backoff_factor = 1.0
     status_to_retry = [429, 500, 502, 503, 504]
@@ -121,8 +122,8 @@ class Settings:
     def get_settings_file(self):
         return os.path.join(self.config_dir, "amt.conf")
 
-    def get_stats_file(self):
-        return os.path.join(self.cache_dir, "stats.json")
+    def get_stats_file(self, identifier=None):
+        return os.path.join(self.cache_dir, "stats-{}.json".format(identifier) if identifier else "stats.json")
 
     def get_web_cache(self, url):
         return os.path.join(self.cache_dir, url.replace("/", "_"))
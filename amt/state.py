@@ -1,19 +1,24 @@
+import hashlib
 import json
 import logging
+import operator
 import os
 import random
+import shutil
 
 from . import stats
+from .job import Job
 from .stats import Details, SortIndex, StatGroup
 from .util.media_type import MediaType
 
 
-def json_decoder(obj):
-    if "server_id" in obj:
-        return MediaData(obj)
-    if "number" in obj:
-        return ChapterData(obj)
-    return obj
+def iter_shuffled(values):
+    """ Lazy Fisher-Yates; consumers that stop early only pay for the items they draw"""
+    values = list(values)
+    for i in range(len(values) - 1, -1, -1):
+        j = random.randrange(i + 1)
+        values[i], values[j] = values[j], values[i]
+        yield values[i]
 
 
 class State:
@@ -28,35 +33,57 @@ class State:
         self.hashes = {}
         self.cookie_hash = None
         self.server_cache = {}
+        self._names_cache = {}
+        self._name_index = None
+        self._saved_chapter_counts = {}
 
         self.load()
 
+    json_encoder = json.JSONEncoder(indent=4, sort_keys=True)
+
     @staticmethod
     def get_hash(json_dict):
         if not json_dict or not any(map(lambda x: json_dict[x], json_dict)):
-            return 0, ""
-        json_str = json.dumps(json_dict, indent=4, sort_keys=True)
-        return hash(json_str), json_str
-
-    def read_file_as_dict(self, file_name, object_hook=json_decoder):
+            return 0
+        # Stream the encoding through the hasher so unchanged saves never
+        # materialize the full document
+        hasher = hashlib.blake2b(digest_size=8)
+        for chunk in State.json_encoder.iterencode(json_dict):
+            hasher.update(chunk.encode())
+        return hasher.hexdigest()
+
+    def read_file_as_dict(self, file_name):
         try:
-            with open(file_name, "r") as jsonFile:
+            # Read the raw bytes in one shot; json.loads decodes them directly
+            # and the hash below reuses the same buffer without re-encoding
+            with open(file_name, "rb") as jsonFile:
                 logging.debug("Loading file %s", file_name)
 
-                json_dict = json.load(jsonFile, object_hook=object_hook)
-                self.hashes[file_name] = State.get_hash(json_dict)[0]
+                json_bytes = jsonFile.read()
+                json_dict = json.loads(json_bytes)
+                # save_to_file writes exactly this canonical form, so hashing
+                # the text avoids re-serializing everything that was just loaded
+                self.hashes[file_name] = hashlib.blake2b(json_bytes, digest_size=8).hexdigest() if json_dict and any(json_dict.values()) else 0
                 return json_dict
         except (json.decoder.JSONDecodeError, FileNotFoundError):
             return {}
 
     def save_to_file(self, file_name, json_dict):
-        h, json_str = State.get_hash(json_dict)
+        h = State.get_hash(json_dict)
         if self.hashes.get(file_name, 0) == h:
             return False
         self.hashes[file_name] = h
         os.makedirs(os.path.dirname(file_name), exist_ok=True)
-        with open(file_name, "w") as jsonFile:
-            jsonFile.write(json_str)
+        # Write to a sibling temp file and atomically swap it in so a crash
+        # mid-write can't corrupt the previously saved state
+        tmp_file_name = file_name + ".tmp"
+        with open(tmp_file_name, "w") as jsonFile:
+            if h:
+                jsonFile.writelines(State.json_encoder.iterencode(json_dict))
+        try:
+            os.replace(tmp_file_name, file_name)
+        except OSError:
+            shutil.move(tmp_file_name, file_name)
         logging.info("Persisting state to %s", file_name)
 
         return True
@@ -67,7 +94,19 @@ class State:
         self.save_to_file(self.settings.get_bundle_metadata_file(), self.bundles)
         self.save_to_file(self.settings.get_server_cache_file(), self.server_cache)
         for media_data in self.media.values():
-            self.save_to_file(self.settings.get_chapter_metadata_file(media_data), media_data.chapters)
+            file_name = self.settings.get_chapter_metadata_file(media_data)
+            chapters = media_data.chapters
+            # Chapter files dominate save cost; skip re-serializing ones that
+            # provably haven't changed since they were last hashed. Length
+            # guards deletions and new chapters start dirty, so equal-count
+            # swaps are still caught
+            if file_name in self.hashes and len(chapters) == self._saved_chapter_counts.get(file_name) and not any(getattr(chapter, "dirty", True) for chapter in chapters.values()):
+                continue
+            self.save_to_file(file_name, chapters)
+            self._saved_chapter_counts[file_name] = len(chapters)
+            for chapter in chapters.values():
+                if isinstance(chapter, ChapterData):
+                    chapter.dirty = False
 
     def set_session(self, session, no_load=False):
         self.session = session
@@ -85,6 +124,13 @@ class State:
         self.all_media = self.read_file_as_dict(self.settings.get_metadata_file())
         if not self.all_media:
             self.all_media = dict(media={}, disabled_media={})
+        else:
+            # The schema is known, so promote exactly the media entries rather
+            # than paying an object_hook call for every decoded object
+            for media_map_key in ("media", "disabled_media"):
+                media_map = self.all_media[media_map_key]
+                for key, media_data in media_map.items():
+                    media_map[key] = MediaData(media_data)
         self.media = self.all_media["media"]
         self.disabled_media = self.all_media["disabled_media"]
 
@@ -92,8 +138,11 @@ class State:
             if key != media_data.global_id:
                 del self.media[key]
                 self.media[media_data.global_id] = media_data
-            if not media_data.chapters:
-                media_data.chapters = self.read_file_as_dict(self.settings.get_chapter_metadata_file(media_data))
+
+        def load_chapters(media_data):
+            media_data.chapters = {chapter_id: ChapterData(chapter) for chapter_id, chapter in self.read_file_as_dict(self.settings.get_chapter_metadata_file(media_data)).items()}
+        # One small file per media; overlap the reads instead of opening them serially
+        Job(self.settings.threads, [media_data for media_data in self.media.values() if not media_data.chapters], func=load_chapters).run()
 
     def _set_session_hash(self):
         """
@@ -101,7 +150,12 @@ class State:
         @return True iff the hash is different than the already saved one
 
         """
-        cookie_hash = hash(str(self.session.cookies))
+        # Hash only the fields save_session_cookies persists instead of
+        # materializing the whole jar repr; sorting keeps the digest stable
+        hasher = hashlib.blake2b(digest_size=8)
+        for cookie in sorted(self.session.cookies, key=lambda cookie: (cookie.domain, cookie.name, cookie.path)):
+            hasher.update("{}\t{}\t{}\t{}\t{}\t{}\t{}\n".format(cookie.domain, cookie.domain_specified, cookie.path, cookie.secure, cookie.expires or 0, cookie.name, cookie.value).encode())
+        cookie_hash = hasher.digest()
         if cookie_hash != self.cookie_hash:
             self.cookie_hash = cookie_hash
             return True
@@ -133,10 +187,9 @@ class State:
             return False
 
         os.makedirs(self.settings.cache_dir, exist_ok=True)
+        lines = ["\t".join([cookie.domain, str(cookie.domain_specified), cookie.path, str(cookie.secure).upper(), str(cookie.expires) if cookie.expires else "", cookie.name, cookie.value]) for cookie in self.session.cookies]
         with open(self.settings.get_cookie_file(), "w") as f:
-            for cookie in self.session.cookies:
-                l = [cookie.domain, str(cookie.domain_specified), cookie.path, str(cookie.secure).upper(), str(cookie.expires) if cookie.expires else "", cookie.name, cookie.value]
-                f.write("\t".join(l) + "\n")
+            f.write("\n".join(lines) + "\n" if lines else "")
         return True
 
     def is_out_of_date(self):
@@ -155,33 +208,40 @@ class State:
         self.all_media["version"] = State.version
 
     def configure_media(self, server_list):
-        for key in list(self.media.keys()):
-            if self.media[key]["server_id"] not in server_list:
-                self.disabled_media[key] = self.media[key]
-                del self.media[key]
-
-        for key in list(self.disabled_media.keys()):
-            if self.disabled_media[key]["server_id"] in server_list:
-                self.media[key] = self.disabled_media[key]
-                del self.disabled_media[key]
+        to_disable = {key: media_data for key, media_data in self.media.items() if media_data["server_id"] not in server_list}
+        to_enable = {key: media_data for key, media_data in self.disabled_media.items() if media_data["server_id"] in server_list}
+        for key in to_disable:
+            del self.media[key]
+        for key in to_enable:
+            del self.disabled_media[key]
+        self.media.update(to_enable)
+        self.disabled_media.update(to_disable)
         self.update_server_cache(server_list)
+        self.invalidate_name_cache()
 
     def update_server_cache(self, server_list={}):
         self.server_cache = {server.id: {"media_type": server.media_type.value, "has_login": server.has_login()} for server in server_list.values()}
 
+    def invalidate_name_cache(self):
+        self._names_cache.clear()
+        self._name_index = None
+
     def get_all_names(self, media_type=None, disallow_servers=False):
-        names = []
-        if not disallow_servers:
-            for server_id in self.server_cache:
-                if not media_type or self.server_cache[server_id]["media_type"] & media_type:
-                    names.append(server_id)
-        for media_id, media in self.media.items():
-            if not media_type or media["media_type"] & media_type:
-                names.append(media_id)
-                if media.global_id_alt:
-                    names.append(media.global_id_alt)
-                names.append(media["name"])
-        return names
+        key = (media_type, disallow_servers)
+        if key not in self._names_cache:
+            names = []
+            if not disallow_servers:
+                for server_id in self.server_cache:
+                    if not media_type or self.server_cache[server_id]["media_type"] & media_type:
+                        names.append(server_id)
+            for media_id, media in self.media.items():
+                if not media_type or media["media_type"] & media_type:
+                    names.append(media_id)
+                    if media.global_id_alt:
+                        names.append(media.global_id_alt)
+                    names.append(media["name"])
+            self._names_cache[key] = names
+        return self._names_cache[key]
 
     def get_all_single_names(self, media_type=None):
         return self.get_all_names(media_type=media_type, disallow_servers=True)
@@ -192,10 +252,18 @@ class State:
     def get_server_ids_with_logins(self):
         return [k for k, v in self.server_cache.items() if v["has_login"]]
 
+    def list_servers(self):
+        print("\n".join(sorted(self.get_server_ids())))
+
     def mark_bundle_as_read(self, bundle_name):
         bundled_data = self.bundles[bundle_name]
+        # Bundles group many chapters of few media; resolve each chapters dict once
+        chapters_by_media = {}
         for data in bundled_data:
-            self.media[data["media_id"]]["chapters"][data["chapter_id"]]["read"] = True
+            chapters = chapters_by_media.get(data["media_id"])
+            if chapters is None:
+                chapters = chapters_by_media[data["media_id"]] = self.media[data["media_id"]].chapters
+            chapters[data["chapter_id"]]["read"] = True
 
     def get_lead_media_data(self, bundle):
         bundled_data = self.bundles[bundle] if isinstance(bundle, str) else bundle
@@ -206,13 +274,19 @@ class State:
         if isinstance(name, dict):
             yield name
             return
-        media = self.media.values()
+        if name is not None:
+            # Index media by the keys a name can match so lookups skip the full scan
+            if self._name_index is None:
+                self._name_index = {}
+                for media_data in self.media.values():
+                    for key in {media_data["server_id"], media_data["name"], media_data.global_id}:
+                        self._name_index.setdefault(key, []).append(media_data)
+            media = self._name_index.get(name, ())
+        else:
+            media = self.media.values()
         if shuffle:
-            media = list(media)
-            random.shuffle(media)
+            media = iter_shuffled(media)
         for media_data in media:
-            if name is not None and name not in (media_data["server_id"], media_data["name"], media_data.global_id):
-                continue
             if media_type and media_data["media_type"] & media_type == 0:
                 continue
             if tag and tag not in media_data["tags"] or tag == "" and not media_data["tags"]:
@@ -223,59 +297,73 @@ class State:
         return next(self.get_media(media_type=media_type, name=name))
 
     def list_media(self, name=None, media_type=None, out_of_date_only=False, tag=None, csv=False):
+        lines = []
         for media_data in self.get_media(name=name, media_type=media_type, tag=tag):
             last_chapter_num = media_data.get_last_chapter_number()
             last_read = media_data.get_last_read()
             if not out_of_date_only or last_chapter_num != last_read:
                 if csv:
-                    print("\t".join([media_data.friendly_id, media_data["name"], media_data["season_title"], str(last_read), str(last_chapter_num), ",".join(media_data["tags"])]))
+                    lines.append("\t".join([media_data.friendly_id, media_data["name"], media_data["season_title"], str(last_read), str(last_chapter_num), ",".join(media_data["tags"])]))
                 else:
-                    print("{}\t{} {}\t{}/{} {}".format(media_data.friendly_id, media_data["name"], media_data["season_title"], last_read, last_chapter_num, ",".join(media_data["tags"])))
+                    lines.append("{}\t{} {}\t{}/{} {}".format(media_data.friendly_id, media_data["name"], media_data["season_title"], last_read, last_chapter_num, ",".join(media_data["tags"])))
+        if lines:
+            print("\n".join(lines))
 
     def list_chapters(self, name, show_ids=False):
         media_data = self.get_single_media(name=name)
-        for chapter in media_data.get_sorted_chapters():
-            print("{:4}:{}{}".format(chapter["number"], chapter["title"], ":" + chapter["id"] if show_ids else ""))
+        lines = ["{:4}:{}{}".format(chapter["number"], chapter["title"], ":" + chapter["id"] if show_ids else "") for chapter in media_data.get_sorted_chapters()]
+        if lines:
+            print("\n".join(lines))
 
     def save_stats(self, identifier, stats):
-        stats_file = self.settings.get_stats_file()
-        saved_data = self.read_file_as_dict(stats_file)
-        saved_data.update({identifier or "": stats})
-        self.save_to_file(stats_file, saved_data)
+        self.save_to_file(self.settings.get_stats_file(identifier), {identifier or "": stats})
 
     def list_stats(self, username=None, media_type=None, stat_group=StatGroup.NAME, sort_index=SortIndex.NAME, reverse=False, min_count=0, min_score=1, details_type=Details.NAME, details_limit=None):
-        saved_data = self.read_file_as_dict(self.settings.get_stats_file())
+        saved_data = self.read_file_as_dict(self.settings.get_stats_file(username))
         data = saved_data.get(username if username else "", {})
         if media_type:
             data = list(filter(lambda x: x["media_type"] == media_type, data))
         grouped_data = stats.group_entries(data, min_score=min_score)[stat_group.value]
         sorted_data = stats.compute_stats(grouped_data, sort_index.value, reverse=reverse, min_count=min_count, details_type=details_type, details_limit=details_limit)
-        print("IDX", stats.get_header_str(stat_group, details_type=details_type))
-        for i, entry in enumerate(sorted_data):
-            print(f"{i+1:3} {stats.get_entry_str(entry, details_type)}")
+        print("\n".join(["IDX " + stats.get_header_str(stat_group, details_type=details_type)] + [f"{i+1:3} {stats.get_entry_str(entry, details_type)}" for i, entry in enumerate(sorted_data)]))
 
 
 class MediaData(dict):
+    # Field storage stays in the dict itself; slots just drop the per-instance
+    # __dict__ that the cache attributes would otherwise force
+    __slots__ = ("chapters", "_sorted_chapters", "_global_id")
+
     def __init__(self, backing_map):
         self.chapters = {}
+        self._sorted_chapters = None
+        self._global_id = None
         if "chapters" in backing_map:
-            self.chapters = backing_map["chapters"]
+            self.chapters = {chapter_id: chapter if isinstance(chapter, ChapterData) else ChapterData(chapter) for chapter_id, chapter in backing_map["chapters"].items()}
             del backing_map["chapters"]
 
         super().__init__(backing_map)
 
-    def __getitem__(self, key):
-        if key == "chapters":
-            return self.chapters
-        else:
-            return super().__getitem__(key)
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        if key in ("server_id", "id", "season_id", "lang"):
+            self._global_id = None
 
     def get_sorted_chapters(self):
-        return sorted(self["chapters"].values(), key=lambda x: x["number"])
+        # The length check catches direct additions/removals to the chapters
+        # dict; in-place renumbering has to invalidate explicitly
+        if self._sorted_chapters is None or len(self._sorted_chapters) != len(self.chapters):
+            self._sorted_chapters = sorted(self.chapters.values(), key=operator.itemgetter("number"))
+        return self._sorted_chapters
+
+    def invalidate_sorted_chapters_cache(self):
+        self._sorted_chapters = None
 
     @property
     def global_id(self):
-        return "{}:{}{}{}".format(self["server_id"], self["id"], (self["season_id"] if self["season_id"] else ""), self.get("lang", "")[:3])
+        # Used as a dict key all over; format it once and reuse
+        if self._global_id is None:
+            self._global_id = "".join((self["server_id"], ":", str(self["id"]), str(self.get("season_id") or ""), self.get("lang", "")[:3]))
+        return self._global_id
 
     @property
     def global_id_alt(self):
@@ -291,27 +379,44 @@ class MediaData(dict):
             dest[key] = self.get(key)
 
     def get_last_chapter_number(self):
-        return max(self["chapters"].values(), key=lambda x: x["number"])["number"] if self["chapters"] else 0
+        # The memoized sorted list makes the extrema lookups O(1)/O(unread)
+        sorted_chapters = self.get_sorted_chapters()
+        return sorted_chapters[-1]["number"] if sorted_chapters else 0
 
     def get_first_chapter_number_greater_than_zero(self):
-        return min(self["chapters"].values(), key=lambda x: x["number"] if x["number"] > 0 else float("inf"))["number"]
+        return min(self.chapters.values(), key=lambda x: x["number"] if x["number"] > 0 else float("inf"))["number"]
 
     def get_last_read(self):
-        return max(filter(lambda x: x["read"], self["chapters"].values()), key=lambda x: x["number"], default={"number": 0})["number"]
+        for chapter in reversed(self.get_sorted_chapters()):
+            if chapter["read"]:
+                return chapter["number"]
+        return 0
 
     def get_labels(self):
         return [self.global_id, self["name"], self["server_id"], MediaType(self["media_type"]).name]
 
 
 class ChapterData(dict):
-    update_state = False
+    __slots__ = ("update_state", "dirty")
 
     def __init__(self, backing_map):
         super().__init__(backing_map)
+        self.update_state = False
+        # Fresh chapters count as dirty until a save scan clears them
+        self.dirty = True
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.dirty = True
+
+    def pop(self, *args):
+        self.dirty = True
+        return super().pop(*args)
 
     def update(self, key_pars):
         super().update(key_pars)
         self.update_state = True
+        self.dirty = True
 
     def check_if_updated_and_clear(self):
         updated = self.update_state
@@ -212,7 +212,7 @@ class BaseUnitTestClass(unittest.TestCase):
             assert isinstance(media_list, list)
             for media_data in media_list:
                 self.assertTrue(isinstance(media_data, MediaData), type(media_data))
-                for chapter_data in media_data["chapters"].values():
+                for chapter_data in media_data.chapters.values():
                     self.assertTrue(isinstance(chapter_data, ChapterData), type(chapter_data))
                 assert "\n" not in media_data["name"]
 
@@ -460,6 +460,10 @@ class ServerWorkflowsTest(BaseUnitTestClass):
             remaining_servers = import_sub_classes(tests, TestServer)
             self.assertNotEqual(remaining_servers, TEST_SERVERS)
 
+    def test_lazy_server_discovery(self):
+        self.assertEqual(len(SERVERS), len(list(SERVERS)))
+        self.assertTrue(SERVERS)
+
     def test_media_reader_add_remove_media(self):
         for server in self.media_reader.get_servers():
             with self.subTest(server=server.id):
@@ -623,7 +627,7 @@ class MediaReaderTest(BaseUnitTestClass):
         self.reload()
         self.assertEqual(old_hash, State.get_hash(self.media_reader.media))
         for media_data in self.media_reader.get_media():
-            self.assertTrue(media_data["chapters"])
+            self.assertTrue(media_data.chapters)
             self.assertTrue(media_data.chapters)
 
     def test_save_load_global_id_format_change(self):
@@ -650,19 +654,19 @@ class MediaReaderTest(BaseUnitTestClass):
     def test_empty_chapter_metadata(self):
         media_data = self.add_test_media(self.test_server, limit=1)[0]
         self.media_reader.state.save()
-        media_data["chapters"].clear()
+        media_data.chapters.clear()
         self.media_reader.state.save()
         self.reload()
 
     def test_mark_chapters_until_n_as_read(self):
         media_data = self.add_test_media(server=self.test_server, limit=1)[0]
-        assert len(media_data["chapters"]) > 2
-        last_chapter_num = max(media_data["chapters"].values(), key=lambda x: x["number"])["number"]
+        assert len(media_data.chapters) > 2
+        last_chapter_num = max(media_data.chapters.values(), key=lambda x: x["number"])["number"]
         last_chapter_num_read = last_chapter_num - 1
         assert last_chapter_num > 1
         self.media_reader.mark_chapters_until_n_as_read(media_data, last_chapter_num_read)
 
-        assert all(map(lambda x: x["read"], filter(lambda x: last_chapter_num_read >= x["number"], media_data["chapters"].values())))
+        assert all(map(lambda x: x["read"], filter(lambda x: last_chapter_num_read >= x["number"], media_data.chapters.values())))
 
     def test_download_unread_chapters(self):
         self.add_test_media(self.test_server)
@@ -678,23 +682,23 @@ class MediaReaderTest(BaseUnitTestClass):
         num_new_chapters = self.media_reader.update_media(media_data)
         self.assertTrue(num_new_chapters)
         self.assertFalse(self.media_reader.update_media(media_data))
-        media_data["chapters"].clear()
+        media_data.chapters.clear()
         num_new_chapters2 = self.media_reader.update_media(media_data)
         self.assertEqual(num_new_chapters, num_new_chapters2)
 
     def test_update_keep_removed(self):
         fake_chapter_id = "fakeId"
         media_list = self.add_test_media()
-        original_len = len(media_list[0]["chapters"])
-        media_list[0]["chapters"][fake_chapter_id] = ChapterData(list(media_list[0]["chapters"].values())[0])
+        original_len = len(media_list[0].chapters)
+        media_list[0].chapters[fake_chapter_id] = ChapterData(list(media_list[0].chapters.values())[0])
         self.media_reader.mark_read()
         self.settings.keep_unavailable = True
         self.media_reader.update()
-        self.assertTrue(fake_chapter_id in media_list[0]["chapters"])
+        self.assertTrue(fake_chapter_id in media_list[0].chapters)
         self.settings.keep_unavailable = False
         self.media_reader.update()
-        self.assertFalse(fake_chapter_id in media_list[0]["chapters"])
-        self.assertEqual(original_len, len(media_list[0]["chapters"]))
+        self.assertFalse(fake_chapter_id in media_list[0].chapters)
+        self.assertEqual(original_len, len(media_list[0].chapters))
         self.verify_all_chapters_read()
 
     def test_preserve_read_status_on_update(self):
@@ -702,17 +706,17 @@ class MediaReaderTest(BaseUnitTestClass):
         self.media_reader.mark_read()
         for i in range(2):
             for media_data in media_list:
-                assert all(map(lambda x: x["read"], media_data["chapters"].values()))
+                assert all(map(lambda x: x["read"], media_data.chapters.values()))
             self.media_reader.update()
 
     def test_mark_read(self):
         media_list = self.add_test_media(self.test_server)
         self.media_reader.mark_read(self.test_server.id)
         for media_data in media_list:
-            assert all(map(lambda x: x["read"], media_data["chapters"].values()))
+            assert all(map(lambda x: x["read"], media_data.chapters.values()))
         self.media_reader.mark_read(self.test_server.id, N=-1)
         for media_data in media_list:
-            assert all(map(lambda x: x["read"], media_data["chapters"].values()))
+            assert all(map(lambda x: x["read"], media_data.chapters.values()))
         self.media_reader.mark_read(self.test_server.id, N=-1, force=True)
         for media_data in media_list:
             chapter_list = media_data.get_sorted_chapters()
@@ -738,7 +742,7 @@ class MediaReaderTest(BaseUnitTestClass):
         self.add_test_media(media_type=MediaType.MANGA, limit=1)
         self.settings.bundle_viewer = "exit 1"
         assert not self.media_reader.read_bundle("none")
-        assert not any([x["read"] for media_data in self.media_reader.get_media() for x in media_data["chapters"].values()])
+        assert not any([x["read"] for media_data in self.media_reader.get_media() for x in media_data.chapters.values()])
 
     def test_stream_anime_bad_url(self):
         assert not self.media_reader.stream("bad_url")
@@ -903,9 +907,9 @@ class LocalServerTest(GenericServerTest, BaseUnitTestClass):
                 for number, chapter_name in enumerate(["00", "01.", "2.0 Chapter Tile", "3 Chapter_Title", "4"]):
                     chapter_id = f"{chapter_name}_{number}"
                     server.update_chapter_data(media_data, id=chapter_id, title=chapter_name, number=number)
-                    chapter_dir = self.settings.get_chapter_dir(media_data, media_data["chapters"][chapter_id])
+                    chapter_dir = self.settings.get_chapter_dir(media_data, media_data.chapters[chapter_id])
                     open(os.path.join(chapter_dir, "text.xhtml"), "w").close()
-                self.assertTrue(len(media_data["chapters"]) > 1, media_data["chapters"].keys())
+                self.assertTrue(len(media_data.chapters) > 1, media_data.chapters.keys())
 
     def test_detect_chapters(self):
         for media_type in list(MediaType):
@@ -914,7 +918,7 @@ class LocalServerTest(GenericServerTest, BaseUnitTestClass):
                 server = self.media_reader.get_server(get_local_server_id(media_type))
                 media_list = self.add_test_media(server=server)
                 for media_data in media_list:
-                    self.assertTrue(media_data["chapters"], media_data["name"])
+                    self.assertTrue(media_data.chapters, media_data["name"])
 
     def test_custom_update(self):
         self.add_test_media()
@@ -1039,7 +1043,7 @@ password=A
             self.assertTrue(media_data["name"], media_data["id"])
             self.assertFalse(media_data["name"].endswith(".test"), media_data["name"])
             self.assertFalse(media_data["name"].endswith("/"), media_data["name"])
-            self.assertTrue(media_data["chapters"])
+            self.assertTrue(media_data.chapters)
 
     def test_stream(self):
         for media_data in self.add_test_media(media_type=MediaType.ANIME):
@@ -1070,6 +1074,18 @@ class ArgsTest(CliUnitTestClass):
         parse_args(media_reader=self.media_reader, args=["list"])
         self.assertFalse(os.listdir(TEST_HOME))
 
+    def test_help(self):
+        self.assertRaises(SystemExit, parse_args, media_reader=self.media_reader, args=["--help"])
+
+    def test_help_with_other_args(self):
+        self.assertRaises(SystemExit, parse_args, media_reader=self.media_reader, args=["--no-save", "--help"])
+
+    def test_log_level(self):
+        parse_args(media_reader=self.media_reader, args=["--log-level", "ERROR", "list"])
+
+    def test_invalid_choice(self):
+        self.assertRaises(SystemExit, parse_args, media_reader=self.media_reader, args=["list-chapters", "UnknownMedia"])
+
     @patch("builtins.input", return_value="0")
     def test_auth(self, input):
         parse_args(media_reader=self.media_reader, args=["auth"])
@@ -1236,11 +1252,11 @@ class ArgsTest(CliUnitTestClass):
         media_data = media_list[0]
         name = media_data.global_id
         parse_args(media_reader=self.media_reader, args=["mark-read", name])
-        assert all(map(lambda x: x["read"], media_data["chapters"].values()))
+        assert all(map(lambda x: x["read"], media_data.chapters.values()))
         parse_args(media_reader=self.media_reader, args=["mark-read", "--force", name, "-1"])
-        assert not all(map(lambda x: x["read"], media_data["chapters"].values()))
+        assert not all(map(lambda x: x["read"], media_data.chapters.values()))
         parse_args(media_reader=self.media_reader, args=["mark-unread", name])
-        assert not any(map(lambda x: x["read"], media_data["chapters"].values()))
+        assert not any(map(lambda x: x["read"], media_data.chapters.values()))
 
     def test_sync_progress(self):
         parse_args(media_reader=self.media_reader, args=["--auto", "load"])
@@ -1287,23 +1303,23 @@ class ArgsTest(CliUnitTestClass):
 
     def test_update(self):
         media_list = self.add_test_media(no_update=True)
-        self.assertEqual(len(media_list[0]["chapters"]), 0)
+        self.assertEqual(len(media_list[0].chapters), 0)
         parse_args(media_reader=self.media_reader, args=["update"])
-        self.assertTrue(media_list[0]["chapters"])
+        self.assertTrue(media_list[0].chapters)
 
     def test_offset(self):
         media_list = self.add_test_media()
         media_data = media_list[0]
-        chapters = media_data["chapters"]
+        chapters = media_data.chapters
         list_of_numbers = sorted([chapter_data["number"] for chapter_data in chapters.values()])
         offset_list = list(map(lambda x: x - 1, list_of_numbers))
         parse_args(media_reader=self.media_reader, args=["offset", media_data.global_id, "1"])
         self.assertEqual(offset_list, sorted([chapter_data["number"] for chapter_data in chapters.values()]))
-        self.verify_unique_numbers(media_data["chapters"])
+        self.verify_unique_numbers(media_data.chapters)
 
     def test_offset_update(self):
         media_data = self.add_test_media(limit=1)[0]
-        chapters = media_data["chapters"]
+        chapters = media_data.chapters
         list_of_numbers = sorted([chapter_data["number"] for chapter_data in chapters.values()])
         offset_list = list(map(lambda x: x - 1, list_of_numbers))
         parse_args(media_reader=self.media_reader, args=["offset", media_data.global_id, "1"])
@@ -1417,7 +1433,7 @@ class ArgsTest(CliUnitTestClass):
         self.media_reader.download_unread_chapters()
         self.media_reader.mark_read()
         self.media_reader.state.save()
-        media_data["chapters"].clear()
+        media_data.chapters.clear()
         self.media_reader.state.save()
         parse_args(media_reader=self.media_reader, args=["clean"])
         self.assertEqual(1, len(os.listdir(self.settings.get_media_dir(media_data))))
@@ -1472,7 +1488,7 @@ class ArgsTest(CliUnitTestClass):
         media_data = media_list[0]
         for name in (media_data["name"], media_data.global_id):
             parse_args(media_reader=self.media_reader, args=["bundle", str(name)])
-            self.assertEqual(len(list(self.media_reader.bundles.values())[0]), len(media_data["chapters"]))
+            self.assertEqual(len(list(self.media_reader.bundles.values())[0]), len(media_data.chapters))
             self.media_reader.bundles.clear()
 
     def test_bundle_limit(self):
@@ -1548,7 +1564,7 @@ class ArgsTest(CliUnitTestClass):
         server = self.media_reader.get_server(TestAnimeServer.id)
         media_data = server.get_media_data_from_url(TestAnimeServer.get_streamable_url())
         server.update_media_data(media_data)
-        chapter_data = media_data["chapters"][server.get_chapter_id_for_url(TestAnimeServer.get_streamable_url())]
+        chapter_data = media_data.chapters[server.get_chapter_id_for_url(TestAnimeServer.get_streamable_url())]
         self.verify_download(media_data, chapter_data)
 
     def test_download_stream(self):
@@ -1597,8 +1613,8 @@ class ArgsTest(CliUnitTestClass):
                 assert not os.path.exists(file_name)
                 media_data = self.media_reader.get_single_media(name=name)
 
-                self.assertTrue(str(number) in media_data["chapters"], media_data["chapters"].keys())
-                self.assertEqual(media_data["chapters"][str(number)]["number"], number)
+                self.assertTrue(str(number) in media_data.chapters, media_data.chapters.keys())
+                self.assertEqual(media_data.chapters[str(number)]["number"], number)
                 assert re.search(r"^\w+$", media_data["id"])
                 self.assertEqual(media_data["media_type"], media_type)
 
@@ -1630,6 +1646,15 @@ class ArgsTest(CliUnitTestClass):
         chapter_data = list(media_data.get_sorted_chapters())[0]
         self.assertEqual(chapter_data["title"], chapter_title)
 
+    def test_import_cross_device_fallback(self):
+        file_name = "01 - Steins;Gate.mkv"
+        with open(file_name, "w") as f:
+            f.write("dummy_data")
+        with patch("amt.media_reader.os.replace", side_effect=OSError):
+            parse_args(media_reader=self.media_reader, args=["import", "--media-type", "ANIME", file_name])
+        assert not os.path.exists(file_name)
+        assert self.media_reader.get_single_media(name="Steins;Gate")
+
     def _test_upgrade_helper(self, minor):
         self.add_test_media(self.test_anime_server)
         ids = list(self.media_reader.get_media_ids())
@@ -1637,10 +1662,10 @@ class ArgsTest(CliUnitTestClass):
         new_key = "alt_id"
         self.media_reader.media[ids[0]][removed_key] = False
         del self.media_reader.media[ids[0]][new_key]
-        next(iter(self.media_reader.media[ids[1]]["chapters"].values())).pop("special")
+        next(iter(self.media_reader.media[ids[1]].chapters.values())).pop("special")
         self.media_reader.mark_read()
 
-        next(iter(self.media_reader.media[ids[2]]["chapters"].values()))["old_chapter_field"] = 10
+        next(iter(self.media_reader.media[ids[2]].chapters.values()))["old_chapter_field"] = 10
 
         self.media_reader.state.update_verion()
         self.media_reader.state.all_media["version"] -= .1 if minor else 1
@@ -1650,8 +1675,8 @@ class ArgsTest(CliUnitTestClass):
         self.assertEqual(removed_key in self.media_reader.media[ids[0]], minor)
         self.assertTrue(new_key in self.media_reader.media[ids[0]])
         if not minor:
-            self.assertTrue(all(["special" in x for x in self.media_reader.media[ids[1]]["chapters"].values()]))
-            self.assertTrue(all(["old_chapter_field" not in x for x in self.media_reader.media[ids[2]]["chapters"].values()]))
+            self.assertTrue(all(["special" in x for x in self.media_reader.media[ids[1]].chapters.values()]))
+            self.assertTrue(all(["old_chapter_field" not in x for x in self.media_reader.media[ids[2]].chapters.values()]))
         self.assertTrue(all([media_data.get_last_read() == media_data.get_last_chapter_number() for media_data in self.media_reader.get_media()]))
 
     def test_upgrade_minor(self):
@@ -1738,14 +1763,14 @@ class ServerStreamTest(RealBaseUnitTestClass):
                 server = servers[0]
                 media_data = server.get_media_data_from_url(url)
                 assert media_data
-                if not media_data["chapters"]:
+                if not media_data.chapters:
                     server.update_media_data(media_data)
                 self.assertEqual(media_id, str(media_data["id"]))
                 if season_id:
                     self.assertEqual(season_id, str(media_data["season_id"]))
                 if chapter_id:
                     self.assertEqual(chapter_id, str(server.get_chapter_id_for_url(url)))
-                    self.assertTrue(chapter_id in media_data["chapters"])
+                    self.assertTrue(chapter_id in media_data.chapters)
         self.for_each(func, self.streamable_urls)
 
     def test_media_steam(self):
@@ -1820,16 +1845,16 @@ class ServerSpecificTest(RealBaseUnitTestClass):
         server.time_to_live_sec = 0
         media_data = server.get_media_list()[0]
         self.media_reader.add_media(media_data)
-        self.assertTrue(media_data["chapters"])
+        self.assertTrue(media_data.chapters)
         self.media_reader.download_unread_chapters(name=media_data.global_id, limit=1)
 
-        self.assertTrue(media_data["chapters"])
+        self.assertTrue(media_data.chapters)
         self.assertTrue(os.path.exists(self.settings.get_media_dir(media_data)))
         self.media_reader.update(name=media_data.global_id)
-        self.assertTrue(media_data["chapters"])
+        self.assertTrue(media_data.chapters)
 
         self.assertTrue(os.path.exists(self.settings.get_media_dir(media_data)))
-        for chapter_data in media_data["chapters"].values():
+        for chapter_data in media_data.chapters.values():
             chapter_path = self.settings.get_chapter_dir(media_data, chapter_data, skip_create=True)
             self.assertFalse(os.path.exists(chapter_path))
 
@@ -1849,7 +1874,7 @@ class PremiumTest(RealBaseUnitTestClass):
                     download_passed = False
                     for media_data in media_list:
                         server.update_media_data(media_data)
-                        chapter_data = next(filter(lambda x: x["premium"], media_data["chapters"].values()), None)
+                        chapter_data = next(filter(lambda x: x["premium"], media_data.chapters.values()), None)
                         if chapter_data:
                             assert server.download_chapter(media_data, chapter_data, page_limit=1)
                             assert not server.download_chapter(media_data, chapter_data, page_limit=1)
@@ -11,6 +11,10 @@ number_regex = re.compile(r"(\d+\.?\d*)[ \.]")
 
 id_formatter_regex = re.compile(r"\W+")
 
+trailing_non_word_regex = re.compile(r"\W*$")
+trailing_punctuation_regex = re.compile(r"\s*[^\w\d\s]+.*$")
+articles_regex = re.compile(r"(The |A |That |\W.*$)")
+
 
 def get_media_name_from_file(file_name, fallback_name=None, is_dir=True):
     base_name = os.path.basename(file_name if file_name[-1] != "/" else file_name[:-1])
@@ -28,11 +32,13 @@ def get_number_from_file_name(file_name, media_name="", default_num=0):
 
 
 def get_alt_names(media_name):
-    return list(filter(lambda x: x, dict.fromkeys([media_name, media_name.split(" Season")[0], re.sub(r"\W*$", "", media_name), re.sub(r"\s*[^\w\d\s]+.*$", "", media_name), re.sub(r"(The |A |That |\W.*$)", "", media_name), get_media_name_from_file(media_name, is_dir=True)])))
+    return list(filter(lambda x: x, dict.fromkeys([media_name, media_name.split(" Season")[0], trailing_non_word_regex.sub("", media_name), trailing_punctuation_regex.sub("", media_name), articles_regex.sub("", media_name), get_media_name_from_file(media_name, is_dir=True)])))
 
 
 def find_media_with_similar_name_in_list(media_names, media_list):
     media_names = list(map(str.lower, media_names))
     for media_data in media_list:
-        if any(map(lambda name: name in media_data["name"].lower() or name in media_data["season_title"].lower() or media_data["name"].lower() in name, media_names)):
+        media_name = media_data["name"].lower()
+        season_title = media_data["season_title"].lower()
+        if any(map(lambda name: name in media_name or name in season_title or media_name in name, media_names)):
             yield media_data